@@ -1,5 +1,6 @@
 import streamlit as st
 import database
+import jobs
 import utils
 from components.navbar import render_navbar
 
@@ -13,6 +14,10 @@ st.set_page_config(
 
 # Initialize DB on start
 database.init_all_tables()
+# Start loading the AI model in the background so it is warm by the time it's needed
+utils.preload_summarizer()
+# Finish summaries a previous server process left queued
+jobs.resume_unfinished_jobs()
 
 # --- Session State ---
 if "logged_in" not in st.session_state:
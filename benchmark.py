@@ -0,0 +1,206 @@
+"""Summarizer benchmarks.
+
+    python benchmark.py quantization [corpus_dir]
+    python benchmark.py presets [corpus_dir]
+
+quantization runs each model variant in its own process (so RSS figures are
+not mixed up) over a fixed corpus. It prints load time, per-document latency,
+peak RSS and the ROUGE drift of each variant's summaries against fp32.
+
+presets times the full summarization path (chunking, map, reduce) under each
+preset in utils.DECODING_PRESETS, including the extractive one, with ROUGE
+against "quality".
+
+corpus_dir is a folder of .txt files; without it a small built-in corpus is used.
+"""
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+
+import inference
+
+MODEL = "sshleifer/distilbart-cnn-12-6"
+GEN_KWARGS = dict(truncation=True, max_length=150, min_length=40, do_sample=False)
+
+SAMPLE_CORPUS = [
+    "Photosynthesis is the process by which green plants, algae and some bacteria convert light energy "
+    "into chemical energy. During the light-dependent reactions, chlorophyll in the thylakoid membranes "
+    "absorbs light and uses it to split water molecules, releasing oxygen and producing ATP and NADPH. "
+    "These energy carriers then drive the Calvin cycle in the stroma, where carbon dioxide is fixed into "
+    "three-carbon sugars by the enzyme RuBisCO. The sugars are used to build glucose, starch and cellulose. "
+    "Because it supplies both the oxygen in the atmosphere and the organic carbon at the base of most food "
+    "chains, photosynthesis underpins nearly all life on Earth. Its rate depends on light intensity, carbon "
+    "dioxide concentration and temperature, and whichever factor is in shortest supply limits the whole process.",
+
+    "The French Revolution began in 1789 amid a fiscal crisis, food shortages and widespread resentment of "
+    "aristocratic privilege. When the Estates-General met at Versailles, the Third Estate declared itself a "
+    "National Assembly and swore not to disband until France had a constitution. The storming of the Bastille "
+    "in July became a symbol of popular resistance to royal authority. Over the following years the Assembly "
+    "abolished feudal dues, issued the Declaration of the Rights of Man and of the Citizen, and reorganised the "
+    "Church. War with neighbouring monarchies and internal divisions radicalised the Revolution, leading to the "
+    "execution of Louis XVI and the Reign of Terror. The period ended with the rise of Napoleon Bonaparte, who "
+    "seized power in 1799 and preserved many revolutionary reforms while ending the republic in all but name.",
+
+    "In object-oriented programming, a class describes the data and behaviour shared by a family of objects. "
+    "Encapsulation hides an object's internal state behind methods, so other code depends only on a stable "
+    "interface. Inheritance lets a subclass reuse and extend the behaviour of a parent class, while "
+    "polymorphism allows code written against the parent type to work with any subclass. Used carelessly, deep "
+    "inheritance hierarchies become fragile, because a change in a base class can ripple through every "
+    "descendant. Many modern guidelines therefore favour composition, in which objects hold references to "
+    "collaborators and delegate work to them. Interfaces or protocols describe what a collaborator must provide "
+    "without fixing how it is implemented, which keeps components loosely coupled and easier to test in isolation.",
+]
+
+
+def load_corpus(corpus_dir=None):
+    if not corpus_dir:
+        return SAMPLE_CORPUS
+    texts = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+                texts.append(f.read())
+    return texts
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _run_variant(quantize, texts, results):
+    start = time.perf_counter()
+    summarizer = inference.build_pipeline(MODEL, quantize=quantize)
+    load_s = time.perf_counter() - start
+    summarizer(texts[0][:500], **GEN_KWARGS)  # warm-up pass, not timed
+
+    latencies, summaries = [], []
+    for text in texts:
+        start = time.perf_counter()
+        summaries.append(summarizer(text, **GEN_KWARGS)[0]['summary_text'])
+        latencies.append(time.perf_counter() - start)
+    results.put({'load_s': load_s, 'latencies': latencies, 'summaries': summaries, 'rss_mb': peak_rss_mb()})
+
+
+def run_variant(quantize, texts):
+    """Benchmark one variant in a fresh process and return its measurements."""
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run_variant, args=(quantize, texts, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def _tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngram_f1(candidate, reference, n):
+    def grams(tokens):
+        counts = {}
+        for gram in zip(*(tokens[i:] for i in range(n))):
+            counts[gram] = counts.get(gram, 0) + 1
+        return counts
+    cand, ref = grams(candidate), grams(reference)
+    overlap = sum(min(count, ref.get(gram, 0)) for gram, count in cand.items())
+    return _f1(overlap, sum(cand.values()), sum(ref.values()))
+
+
+def _lcs_f1(candidate, reference):
+    previous = [0] * (len(reference) + 1)
+    for c in candidate:
+        current = [0]
+        for j, r in enumerate(reference):
+            current.append(previous[j] + 1 if c == r else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+
+def rouge(candidate, reference):
+    """ROUGE-1/2/L F1 of candidate against reference (simple word tokenization)."""
+    cand, ref = _tokens(candidate), _tokens(reference)
+    return {'rouge1': _ngram_f1(cand, ref, 1), 'rouge2': _ngram_f1(cand, ref, 2), 'rougeL': _lcs_f1(cand, ref)}
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def compare_quantization(corpus_dir=None):
+    texts = load_corpus(corpus_dir)
+    if not texts:
+        print(f"No .txt files found in {corpus_dir}")
+        return 1
+    print(f"Corpus: {len(texts)} documents")
+    baseline = run_variant(False, texts)
+    # First int8 run may include the one-off conversion; the second reads the cache
+    variants = {'fp32': baseline, 'int8': run_variant(True, texts), 'int8 (cached)': run_variant(True, texts)}
+
+    print(f"{'variant':<15}{'load s':>8}{'mean s':>8}{'max s':>8}{'RSS MB':>9}"
+          f"{'R-1':>7}{'R-2':>7}{'R-L':>7}")
+    for name, result in variants.items():
+        scores = [rouge(c, r) for c, r in zip(result['summaries'], baseline['summaries'])]
+        print(f"{name:<15}{result['load_s']:>8.1f}{_mean(result['latencies']):>8.2f}"
+              f"{max(result['latencies']):>8.2f}{result['rss_mb']:>9.0f}"
+              + "".join(f"{_mean([s[k] for s in scores]):>7.3f}" for k in ('rouge1', 'rouge2', 'rougeL')))
+    return 0
+
+
+def compare_presets(corpus_dir=None):
+    import utils
+    texts = load_corpus(corpus_dir)
+    if not texts:
+        print(f"No .txt files found in {corpus_dir}")
+        return 1
+    if utils.load_summarizer() is None:
+        print("Summarizer could not be loaded")
+        return 1
+    print(f"Corpus: {len(texts)} documents")
+    utils._summarize(texts[0][:500], 150, 40)  # warm-up pass, not timed
+
+    results = {}
+    for preset, settings in utils.DECODING_PRESETS.items():
+        latencies, summaries = [], []
+        for text in texts:
+            # Both bypass the summary cache
+            start = time.perf_counter()
+            if settings.get('extractive'):
+                summaries.append(utils.extractive_summary(text, 150))
+            else:
+                summaries.append(utils._summarize(text, 150, 40, preset=preset)[0])
+            latencies.append(time.perf_counter() - start)
+        results[preset] = (latencies, summaries)
+
+    reference = results['quality'][1]
+    print(f"{'preset':<10}{'mean s':>8}{'max s':>8}{'words':>7}{'R-1':>7}{'R-2':>7}{'R-L':>7}")
+    for preset, (latencies, summaries) in results.items():
+        scores = [rouge(c, r) for c, r in zip(summaries, reference)]
+        words = _mean([len(s.split()) for s in summaries])
+        print(f"{preset:<10}{_mean(latencies):>8.2f}{max(latencies):>8.2f}{words:>7.0f}"
+              + "".join(f"{_mean([s[k] for s in scores]):>7.3f}" for k in ('rouge1', 'rouge2', 'rougeL')))
+    return 0
+
+
+COMMANDS = {'quantization': compare_quantization, 'presets': compare_presets}
+
+if __name__ == "__main__":
+    if len(sys.argv) in (2, 3) and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2] if len(sys.argv) == 3 else None))
+    print("usage: python benchmark.py quantization|presets [corpus_dir]")
+    sys.exit(2)
@@ -1,7 +1,13 @@
 import sqlite3
 import os
+import hashlib
+import zlib
+import queue
+import threading
+import time
 import utils
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta, date
 
 logging.basicConfig(level=logging.INFO)
@@ -9,116 +15,340 @@ logger = logging.getLogger(__name__)
 
 DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_buddy.sqlite")
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_FILE)
+# Connection tuning. Streamlit runs every rerun on a fresh script thread, so a
+# small pool shared across threads is reused far better than thread-locals.
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 134217728",   # 128 MB
+    "PRAGMA cache_size = -16000",     # ~16 MB page cache per connection
+)
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+DOCUMENT_COMPRESSION_LEVEL = 6
+
+# Summary cache bounds; least recently used entries are evicted past either
+SUMMARY_CACHE_MAX_ENTRIES = 2000
+SUMMARY_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+# Extracted-text cache bound (compressed bytes), evicted least recently used first
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+def _open_connection():
+    """Open a new tuned connection (WAL, busy timeout, cache pragmas)."""
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def init_all_tables():
+def get_db_connection():
+    """Return a standalone tuned connection. The caller must close it.
+
+    Prefer ``get_connection()``, which reuses pooled connections.
+    """
+    return _open_connection()
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled connection for the duration of a ``with`` block.
+
+    Use ``with conn:`` inside the block for a write transaction. Any
+    transaction left open by an exception is rolled back before the
+    connection goes back to the pool.
+    """
     try:
-        conn = get_db_connection()
-        with conn:
-            # Users
-            conn.execute("""CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                username TEXT UNIQUE NOT NULL, 
-                password_hash TEXT NOT NULL, 
-                created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-            
-            # Tasks - Ensure all columns exist (Migration)
-            conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                username TEXT NOT NULL, 
-                title TEXT NOT NULL, 
-                subject TEXT, 
-                due_date TIMESTAMP, 
-                time_str TEXT,
-                priority TEXT DEFAULT 'Medium', 
-                completed BOOLEAN DEFAULT 0,
-                created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-            
-            # Migration: Add columns if they don't exist
-            try:
-                conn.execute("ALTER TABLE tasks ADD COLUMN time_str TEXT")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE tasks ADD COLUMN completed BOOLEAN DEFAULT 0")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE tasks ADD COLUMN created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            except: pass
-
-            # Summaries
-            conn.execute("""CREATE TABLE IF NOT EXISTS summaries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                username TEXT NOT NULL, 
-                title TEXT,
-                original_text TEXT, 
-                summary_text TEXT, 
-                created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-            
-            # Migration for summaries
-            summary_cols = ["title", "original_text", "summary_text", "created_ts"]
-            for col in summary_cols:
-                try:
-                    conn.execute(f"ALTER TABLE summaries ADD COLUMN {col} TEXT")
-                except: pass
-            
-            # Study Logs
-            conn.execute("""CREATE TABLE IF NOT EXISTS study_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                username TEXT NOT NULL, 
-                subject TEXT, 
-                duration_minutes INTEGER, 
-                started_at TIMESTAMP, 
-                created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""")
-
-            # Create Admin
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
-            if cur.fetchone()[0] == 0:
-                conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", 
-                             ("admin", utils.hash_password("admin123")))
-        conn.close()
-    except Exception as e:
-        logger.error(f"Init Error: {e}")
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_connection()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_all_connections():
+    """Close every idle pooled connection (e.g. before replacing the DB file)."""
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+# --- Schema Migrations ---
+# Each step upgrades the schema by one version; PRAGMA user_version records
+# the last step applied. Append new steps, never edit or reorder old ones.
+
+def _add_missing_columns(conn, table, columns):
+    """ALTER TABLE ADD COLUMN for each (name, decl) pair the table lacks."""
+    existing = {r['name'] for r in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+def _migrate_base_schema(conn):
+    # Users
+    conn.execute("""CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        username TEXT UNIQUE NOT NULL, 
+        password_hash TEXT NOT NULL, 
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+    # Tasks
+    conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        username TEXT NOT NULL, 
+        title TEXT NOT NULL, 
+        subject TEXT, 
+        due_date TIMESTAMP, 
+        time_str TEXT,
+        priority TEXT DEFAULT 'Medium', 
+        completed BOOLEAN DEFAULT 0,
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    # Databases created by older versions may lack these columns.
+    # (SQLite cannot ADD COLUMN with a CURRENT_TIMESTAMP default.)
+    _add_missing_columns(conn, "tasks", [
+        ("time_str", "TEXT"),
+        ("completed", "BOOLEAN DEFAULT 0"),
+        ("created_ts", "TIMESTAMP"),
+    ])
+
+    # Summaries
+    conn.execute("""CREATE TABLE IF NOT EXISTS summaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        username TEXT NOT NULL, 
+        title TEXT,
+        original_text TEXT, 
+        summary_text TEXT, 
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    _add_missing_columns(conn, "summaries", [
+        (col, "TEXT") for col in ("title", "original_text", "summary_text", "created_ts")
+    ])
+
+    # Study Logs
+    conn.execute("""CREATE TABLE IF NOT EXISTS study_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        username TEXT NOT NULL, 
+        subject TEXT, 
+        duration_minutes INTEGER, 
+        started_at TIMESTAMP, 
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+def _migrate_seed_admin(conn):
+    conn.execute("INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                 ("admin", utils.hash_password("admin123")))
+
+def _migrate_indexes(conn):
+    # Composite indexes for the per-user range filters below. Date columns are
+    # stored as ISO text, so half-open string ranges on them are index-backed.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_study_logs_user_started ON study_logs (username, started_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks (username, due_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_completed ON tasks (username, completed)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_user_created ON summaries (username, created_ts)")
+
+def _migrate_study_daily(conn):
+    # Per-day, per-subject rollup of study_logs; analytics read this instead of
+    # re-aggregating raw sessions. Kept in sync by add_study_log().
+    conn.execute("""CREATE TABLE IF NOT EXISTS study_daily (
+        username TEXT NOT NULL,
+        day TEXT NOT NULL,
+        subject TEXT NOT NULL DEFAULT '',
+        minutes INTEGER NOT NULL DEFAULT 0,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (username, day, subject)
+    ) WITHOUT ROWID""")
+    _rebuild_study_daily(conn)
+
+def _migrate_study_streaks(conn):
+    # One row per user so the streak is a point lookup. Updated incrementally
+    # by add_study_log(); readers treat it as broken once last_day is older
+    # than yesterday.
+    conn.execute("""CREATE TABLE IF NOT EXISTS study_streaks (
+        username TEXT PRIMARY KEY,
+        current_streak INTEGER NOT NULL DEFAULT 0,
+        longest_streak INTEGER NOT NULL DEFAULT 0,
+        last_day TEXT
+    )""")
+    _rebuild_study_streaks(conn)
+
+def _migrate_documents(conn):
+    # Content-addressed, compressed storage for summary source texts.
+    # refcount precedes data so refcount scans never touch blob overflow pages.
+    conn.execute("""CREATE TABLE IF NOT EXISTS documents (
+        hash TEXT PRIMARY KEY,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )""")
+    _add_missing_columns(conn, "summaries", [("document_hash", "TEXT")])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_document ON summaries (document_hash)")
+    # Move inline source texts into the document store
+    rows = conn.execute("SELECT id, original_text FROM summaries WHERE original_text IS NOT NULL").fetchall()
+    for r in rows:
+        doc_hash = _store_document(conn, r['original_text'])
+        conn.execute("UPDATE summaries SET document_hash = ?, original_text = NULL WHERE id = ?",
+                     (doc_hash, r['id']))
+
+def _migrate_summary_cache(conn):
+    # Persistent cache of model outputs, keyed by a hash of the normalized input
+    # and generation parameters (see utils.summary_cache_key).
+    conn.execute("""CREATE TABLE IF NOT EXISTS summary_cache (
+        key TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used REAL NOT NULL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_cache_last_used ON summary_cache (last_used)")
+
+def _migrate_summary_jobs(conn):
+    # Background summarization jobs (see jobs.py). The input text is held in
+    # the document store; on success the new summary takes over that reference
+    # and the job row is removed, so this table only holds queued, running and
+    # failed jobs.
+    conn.execute("""CREATE TABLE IF NOT EXISTS summary_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        title TEXT,
+        document_hash TEXT NOT NULL,
+        max_length INTEGER,
+        min_length INTEGER,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress_done INTEGER NOT NULL DEFAULT 0,
+        progress_total INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_jobs_user ON summary_jobs (username, id)")
+
+def _migrate_extraction_cache(conn):
+    # Text extracted from uploads, keyed by a hash of the file bytes (see
+    # utils.extraction_cache_key); data is zlib-compressed, size counts those bytes.
+    conn.execute("""CREATE TABLE IF NOT EXISTS extraction_cache (
+        key TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used REAL NOT NULL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache (last_used)")
+
+def _migrate_summary_job_preset(conn):
+    # Decoding preset (utils.DECODING_PRESETS); jobs queued earlier used beam search
+    _add_missing_columns(conn, "summary_jobs", [("preset", "TEXT NOT NULL DEFAULT 'quality'")])
+
+def _migrate_summary_job_live(conn):
+    # Live-output jobs save the summary written so far, for the page to show
+    _add_missing_columns(conn, "summary_jobs", [
+        ("live", "BOOLEAN NOT NULL DEFAULT 0"),
+        ("partial_summary", "TEXT"),
+    ])
+
+def _migrate_summaries_user_id_index(conn):
+    # Summary history pages by id (see get_summaries_page)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_user_id ON summaries (username, id)")
+
+MIGRATIONS = [
+    _migrate_base_schema,   # 1
+    _migrate_seed_admin,    # 2
+    _migrate_indexes,       # 3
+    _migrate_study_daily,   # 4
+    _migrate_study_streaks, # 5
+    _migrate_documents,     # 6
+    _migrate_summary_cache, # 7
+    _migrate_summary_jobs,  # 8
+    _migrate_summary_job_preset,  # 9
+    _migrate_extraction_cache,  # 10
+    _migrate_summary_job_live,  # 11
+    _migrate_summaries_user_id_index,  # 12
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_schema_version = 0
+_schema_lock = threading.Lock()
+
+def migrate():
+    """Apply pending migrations, one transaction per step. Returns the schema version."""
+    with get_connection() as conn:
+        # Take the write lock before reading the version so concurrent
+        # processes cannot apply the same step twice.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step in MIGRATIONS[version:]:
+                step(conn)
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+                logger.info(f"Applied schema migration {version}: {step.__name__}")
+                conn.execute("BEGIN IMMEDIATE")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+def init_all_tables():
+    """Bring the schema up to date. After the first success per process this is
+    a single integer comparison, so it is cheap to call on every rerun."""
+    global _schema_version
+    if _schema_version >= SCHEMA_VERSION:
+        return
+    with _schema_lock:
+        if _schema_version >= SCHEMA_VERSION:
+            return
+        try:
+            _schema_version = migrate()
+        except Exception as e:
+            logger.error(f"Init Error: {e}")
 
 # --- User Auth ---
 def add_user(username, password_hash):
     try:
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
             conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hash))
-        conn.close()
         return True
     except: return False
 
 def get_user(username):
     try:
-        conn = get_db_connection()
-        user = conn.execute("SELECT username, password_hash FROM users WHERE username = ?", (username,)).fetchone()
-        conn.close()
-        return user
+        with get_connection() as conn:
+            return conn.execute("SELECT username, password_hash FROM users WHERE username = ?", (username,)).fetchone()
     except: return None
 
 # --- Task Management ---
+def _day_range(first_day, last_day=None):
+    """Half-open ISO bounds [first_day, last_day + 1) for indexed text date columns."""
+    last_day = last_day or first_day
+    return first_day.isoformat(), (last_day + timedelta(days=1)).isoformat()
+
 def add_task(username, title, subject, due_date, time_str, priority):
     try:
         # Convert date to string if it's an object
         if hasattr(due_date, 'isoformat'):
             due_date = due_date.isoformat()
             
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
             conn.execute(
                 "INSERT INTO tasks (username, title, subject, due_date, time_str, priority, completed) VALUES (?, ?, ?, ?, ?, ?, 0)",
                 (username, title, subject, due_date, time_str, priority)
             )
-        conn.close()
         return True
     except Exception as e:
         logger.error(f"Add Task Error: {e}")
@@ -126,169 +356,528 @@ def add_task(username, title, subject, due_date, time_str, priority):
 
 def get_tasks(username):
     try:
-        conn = get_db_connection()
-        tasks = conn.execute("SELECT * FROM tasks WHERE username = ? ORDER BY due_date ASC", (username,)).fetchall()
-        conn.close()
-        return tasks
+        with get_connection() as conn:
+            return conn.execute("SELECT * FROM tasks WHERE username = ? ORDER BY due_date ASC", (username,)).fetchall()
     except: return []
 
-def get_todays_tasks(username):
+# Columns the task lists and dashboard actually render
+_TASK_COLUMNS = "id, title, subject, due_date, time_str, priority, completed"
+
+def get_tasks_in_range(username, start=None, end=None, completed=None, limit=None):
+    """Tasks due between start and end (dates, inclusive; None leaves that side open),
+    optionally filtered by completion, ordered by due date."""
+    sql = f"SELECT {_TASK_COLUMNS} FROM tasks WHERE username = ?"
+    params = [username]
+    if start is not None:
+        sql += " AND due_date >= ?"
+        params.append(start.isoformat())
+    if end is not None:
+        sql += " AND due_date < ?"
+        params.append(_day_range(end)[1])
+    if completed is not None:
+        sql += " AND completed = ?"
+        params.append(1 if completed else 0)
+    sql += " ORDER BY due_date ASC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
     try:
-        tasks = get_tasks(username)
-        today_str = date.today().isoformat()
-        # Filter for tasks due today or previously overdue & not completed? 
-        # For dashboard "Today's Schedule", usually strictly today.
-        filtered = []
-        for t in tasks:
-            # Handle due_date being potentially date object or string? 
-            # Sqlite returns string usually.
-            d_val = t['due_date']
-            if not d_val: continue
-            # If d_val is full timestamp string "2026-02-02 00:00:00" or date "2026-02-02"
-            if str(d_val).startswith(today_str):
-                filtered.append(t)
-        return filtered
+        with get_connection() as conn:
+            return conn.execute(sql, params).fetchall()
     except Exception as e:
-        logger.error(f"Todays Tasks Error: {e}")
+        logger.error(f"Tasks In Range Error: {e}")
         return []
 
+def get_todays_tasks(username):
+    # Dashboard "Today's Schedule" is strictly tasks due today
+    today = date.today()
+    return get_tasks_in_range(username, today, today)
+
 def update_task_status(task_id, completed):
     try:
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
             conn.execute("UPDATE tasks SET completed = ? WHERE id = ?", (1 if completed else 0, task_id))
-        conn.close()
         return True
     except: return False
 
 def delete_task(task_id):
     try:
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
             conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        conn.close()
         return True
     except: return False
 
 # --- Summaries ---
+# Source documents live in `documents`, zlib-compressed and keyed by SHA-256 of
+# their text, so re-summarizing the same input stores it once. Summaries hold
+# the hash; `refcount` tracks how many summaries point at each document.
+def _store_document(conn, text):
+    """Insert text (or bump its refcount) and return its content hash."""
+    raw = text.encode('utf-8')
+    doc_hash = hashlib.sha256(raw).hexdigest()
+    conn.execute("""
+        INSERT INTO documents (hash, refcount, size, data) VALUES (?, 1, ?, ?)
+        ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1
+    """, (doc_hash, len(raw), zlib.compress(raw, DOCUMENT_COMPRESSION_LEVEL)))
+    return doc_hash
+
+def _load_document(conn, doc_hash):
+    row = conn.execute("SELECT data FROM documents WHERE hash = ?", (doc_hash,)).fetchone()
+    return zlib.decompress(row['data']).decode('utf-8') if row else None
+
+def _release_document(conn, doc_hash):
+    conn.execute("UPDATE documents SET refcount = refcount - 1 WHERE hash = ?", (doc_hash,))
+    conn.execute("DELETE FROM documents WHERE hash = ? AND refcount <= 0", (doc_hash,))
+
+def _release_documents(conn, where_sql, params):
+    """Drop one reference per summary matched by where_sql, then delete orphans."""
+    conn.execute(f"""
+        UPDATE documents SET refcount = refcount - (
+            SELECT count(*) FROM summaries WHERE document_hash = documents.hash AND {where_sql}
+        )
+        WHERE hash IN (SELECT document_hash FROM summaries WHERE {where_sql})
+    """, params + params)
+    conn.execute("DELETE FROM documents WHERE refcount <= 0")
+
 def add_summary(username, original, summary, title=None):
     if not title:
         title = original[:40] + "..." if len(original) > 40 else original
     try:
-        conn = get_db_connection()
-        with conn:
-             conn.execute("INSERT INTO summaries (username, title, original_text, summary_text) VALUES (?, ?, ?, ?)",
-                          (username, title, original, summary))
-        conn.close()
+        with get_connection() as conn, conn:
+            doc_hash = _store_document(conn, original)
+            conn.execute("INSERT INTO summaries (username, title, document_hash, summary_text) VALUES (?, ?, ?, ?)",
+                         (username, title, doc_hash, summary))
         return True
     except Exception as e:
         logger.error(f"Add Summary Database Error: {e}")
         return False
 
-def get_summaries(username):
+def count_summaries(username):
     try:
-        conn = get_db_connection()
-        rows = conn.execute("SELECT * FROM summaries WHERE username = ? ORDER BY created_ts DESC", (username,)).fetchall()
-        conn.close()
-        return rows
-    except: return []
+        with get_connection() as conn:
+            return conn.execute("SELECT count(*) FROM summaries WHERE username = ?", (username,)).fetchone()[0]
+    except Exception as e:
+        logger.error(f"Count Summaries Error: {e}")
+        return 0
+
+def get_summaries_page(username, limit=5, after=None):
+    """One page of a user's summaries, newest first, without the source text.
+
+    Keyset pagination: pass the ``id`` of the last row of the previous page as
+    ``after`` to get the next (older) page. Ids increase with insertion, and
+    unlike created_ts they are never NULL (databases upgraded by
+    _add_missing_columns have no default for it).
+    """
+    sql = "SELECT id, title, created_ts, summary_text FROM summaries WHERE username = ?"
+    params = [username]
+    if after is not None:
+        sql += " AND id < ?"
+        params.append(after)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    try:
+        with get_connection() as conn:
+            return conn.execute(sql, params).fetchall()
+    except Exception as e:
+        logger.error(f"Summaries Page Error: {e}")
+        return []
+
+def get_summary_original(summary_id):
+    """Load the full source text of one summary on demand."""
+    try:
+        with get_connection() as conn:
+            row = conn.execute("""
+                SELECT s.original_text, d.data FROM summaries s
+                LEFT JOIN documents d ON d.hash = s.document_hash
+                WHERE s.id = ?
+            """, (summary_id,)).fetchone()
+        if not row:
+            return None
+        if row['data'] is not None:
+            return zlib.decompress(row['data']).decode('utf-8')
+        return row['original_text']
+    except Exception as e:
+        logger.error(f"Summary Original Error: {e}")
+        return None
 
 def delete_summary(summary_id):
     try:
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
+            _release_documents(conn, "id = ?", [summary_id])
             conn.execute("DELETE FROM summaries WHERE id = ?", (summary_id,))
-        conn.close()
         return True
     except: return False
 
 def delete_all_summaries(username):
     try:
-        conn = get_db_connection()
-        with conn:
+        with get_connection() as conn, conn:
+            _release_documents(conn, "username = ?", [username])
             conn.execute("DELETE FROM summaries WHERE username = ?", (username,))
-        conn.close()
         return True
     except: return False
 
+def collect_orphan_documents():
+    """Recount document references from summaries and delete unreferenced documents.
+
+    Refcounts are maintained on every insert/delete; this is a repair tool.
+    Returns the number of documents removed.
+    """
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("""
+                UPDATE documents SET refcount = (
+                    SELECT count(*) FROM summaries WHERE document_hash = documents.hash
+                ) + (
+                    SELECT count(*) FROM summary_jobs WHERE document_hash = documents.hash
+                )
+            """)
+            return conn.execute("DELETE FROM documents WHERE refcount <= 0").rowcount
+    except Exception as e:
+        logger.error(f"Document GC Error: {e}")
+        return 0
+
+# --- Summary Jobs ---
+def create_summary_job(username, title, text, max_length, min_length, preset, live=False):
+    """Queue a summarization job and return its id (None on failure).
+
+    live jobs record the summary written so far in partial_summary."""
+    try:
+        with get_connection() as conn, conn:
+            doc_hash = _store_document(conn, text)
+            cur = conn.execute("""
+                INSERT INTO summary_jobs (username, title, document_hash, max_length, min_length, preset, live)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (username, title, doc_hash, max_length, min_length, preset, 1 if live else 0))
+            return cur.lastrowid
+    except Exception as e:
+        logger.error(f"Create Job Error: {e}")
+        return None
+
+def get_summary_job(job_id):
+    try:
+        with get_connection() as conn:
+            return conn.execute("SELECT * FROM summary_jobs WHERE id = ?", (job_id,)).fetchone()
+    except Exception as e:
+        logger.error(f"Get Job Error: {e}")
+        return None
+
+def get_summary_job_text(job_id):
+    """Input text of a job, loaded from the document store."""
+    try:
+        with get_connection() as conn:
+            row = conn.execute("SELECT document_hash FROM summary_jobs WHERE id = ?", (job_id,)).fetchone()
+            return _load_document(conn, row['document_hash']) if row else None
+    except Exception as e:
+        logger.error(f"Get Job Text Error: {e}")
+        return None
+
+def get_user_summary_jobs(username):
+    """A user's queued, running and failed jobs, oldest first."""
+    try:
+        with get_connection() as conn:
+            return conn.execute("""
+                SELECT id, title, status, progress_done, progress_total, error, live, partial_summary
+                FROM summary_jobs WHERE username = ? ORDER BY id
+            """, (username,)).fetchall()
+    except Exception as e:
+        logger.error(f"User Jobs Error: {e}")
+        return []
+
+def get_unfinished_summary_job_ids():
+    """Jobs left queued or running, e.g. by a server restart."""
+    try:
+        with get_connection() as conn:
+            return [r['id'] for r in conn.execute(
+                "SELECT id FROM summary_jobs WHERE status IN ('queued', 'running') ORDER BY id")]
+    except Exception as e:
+        logger.error(f"Unfinished Jobs Error: {e}")
+        return []
+
+def update_summary_job(job_id, status=None, progress_done=None, progress_total=None, partial_summary=None):
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("""
+                UPDATE summary_jobs SET status = coalesce(?, status),
+                    progress_done = coalesce(?, progress_done),
+                    progress_total = coalesce(?, progress_total),
+                    partial_summary = coalesce(?, partial_summary)
+                WHERE id = ?
+            """, (status, progress_done, progress_total, partial_summary, job_id))
+        return True
+    except Exception as e:
+        logger.error(f"Update Job Error: {e}")
+        return False
+
+def complete_summary_job(job_id, summary):
+    """Save the job's result to summaries and remove the job, atomically."""
+    try:
+        with get_connection() as conn, conn:
+            job = conn.execute("SELECT * FROM summary_jobs WHERE id = ?", (job_id,)).fetchone()
+            if not job:
+                return False
+            # The summary inherits the job's document reference
+            conn.execute("INSERT INTO summaries (username, title, document_hash, summary_text) VALUES (?, ?, ?, ?)",
+                         (job['username'], job['title'], job['document_hash'], summary))
+            conn.execute("DELETE FROM summary_jobs WHERE id = ?", (job_id,))
+        return True
+    except Exception as e:
+        logger.error(f"Complete Job Error: {e}")
+        return False
+
+def fail_summary_job(job_id, error):
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("UPDATE summary_jobs SET status = 'failed', error = ? WHERE id = ?", (error, job_id))
+        return True
+    except Exception as e:
+        logger.error(f"Fail Job Error: {e}")
+        return False
+
+def dismiss_summary_job(job_id):
+    """Delete a failed job and release its input document."""
+    try:
+        with get_connection() as conn, conn:
+            job = conn.execute("SELECT document_hash FROM summary_jobs WHERE id = ? AND status = 'failed'",
+                               (job_id,)).fetchone()
+            if job:
+                conn.execute("DELETE FROM summary_jobs WHERE id = ?", (job_id,))
+                _release_document(conn, job['document_hash'])
+        return True
+    except Exception as e:
+        logger.error(f"Dismiss Job Error: {e}")
+        return False
+
+# --- Summary Cache ---
+def get_cached_summary(key):
+    """Return the cached summary for key (and mark it recently used), or None."""
+    try:
+        with get_connection() as conn, conn:
+            row = conn.execute("SELECT summary FROM summary_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE summary_cache SET hits = hits + 1, last_used = ? WHERE key = ?",
+                             (time.time(), key))
+        return row['summary'] if row else None
+    except Exception as e:
+        logger.error(f"Summary Cache Read Error: {e}")
+        return None
+
+def put_cached_summary(key, summary):
+    """Store a summary, then evict least recently used entries over the size/count limits."""
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("""
+                INSERT INTO summary_cache (key, summary, size, last_used) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET summary = excluded.summary, size = excluded.size,
+                                                last_used = excluded.last_used
+            """, (key, summary, len(summary.encode('utf-8')), time.time()))
+            conn.execute("""
+                DELETE FROM summary_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key,
+                               ROW_NUMBER() OVER (ORDER BY last_used DESC) AS n,
+                               sum(size) OVER (ORDER BY last_used DESC) AS running_bytes
+                        FROM summary_cache
+                    ) WHERE n > ? OR running_bytes > ?
+                )
+            """, (SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_MAX_BYTES))
+        return True
+    except Exception as e:
+        logger.error(f"Summary Cache Write Error: {e}")
+        return False
+
+def get_summary_cache_info():
+    """Entry count, total bytes and lifetime hits of the persistent summary cache."""
+    try:
+        with get_connection() as conn:
+            row = conn.execute("SELECT count(*), coalesce(sum(size), 0), coalesce(sum(hits), 0) FROM summary_cache").fetchone()
+        return {'entries': row[0], 'bytes': row[1], 'hits': row[2]}
+    except Exception as e:
+        logger.error(f"Summary Cache Info Error: {e}")
+        return {'entries': 0, 'bytes': 0, 'hits': 0}
+
+# --- Extraction Cache ---
+def get_cached_extraction(key):
+    """Return the cached extracted text for key (and mark it recently used), or None."""
+    try:
+        with get_connection() as conn, conn:
+            row = conn.execute("SELECT data FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE extraction_cache SET hits = hits + 1, last_used = ? WHERE key = ?",
+                             (time.time(), key))
+        return zlib.decompress(row['data']).decode('utf-8') if row else None
+    except Exception as e:
+        logger.error(f"Extraction Cache Read Error: {e}")
+        return None
+
+def put_cached_extraction(key, text):
+    """Store extracted text compressed, then evict least recently used entries over the size limit."""
+    data = zlib.compress(text.encode('utf-8'), DOCUMENT_COMPRESSION_LEVEL)
+    try:
+        with get_connection() as conn, conn:
+            conn.execute("""
+                INSERT INTO extraction_cache (key, data, size, last_used) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET data = excluded.data, size = excluded.size,
+                                                last_used = excluded.last_used
+            """, (key, data, len(data), time.time()))
+            conn.execute("""
+                DELETE FROM extraction_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, sum(size) OVER (ORDER BY last_used DESC) AS running_bytes
+                        FROM extraction_cache
+                    ) WHERE running_bytes > ?
+                )
+            """, (EXTRACTION_CACHE_MAX_BYTES,))
+        return True
+    except Exception as e:
+        logger.error(f"Extraction Cache Write Error: {e}")
+        return False
+
+def get_extraction_cache_info():
+    """Entry count, total compressed bytes and lifetime hits of the extraction cache."""
+    try:
+        with get_connection() as conn:
+            row = conn.execute("SELECT count(*), coalesce(sum(size), 0), coalesce(sum(hits), 0) FROM extraction_cache").fetchone()
+        return {'entries': row[0], 'bytes': row[1], 'hits': row[2]}
+    except Exception as e:
+        logger.error(f"Extraction Cache Info Error: {e}")
+        return {'entries': 0, 'bytes': 0, 'hits': 0}
+
 # --- Study Logs & Stats ---
+# Extends the streak when the previous study day was yesterday, keeps it on a
+# repeat day and restarts it otherwise. SET expressions all see the old row.
+_STREAK_UPSERT_SQL = """
+INSERT INTO study_streaks (username, current_streak, longest_streak, last_day)
+VALUES (:username, 1, 1, :today)
+ON CONFLICT (username) DO UPDATE SET
+    current_streak = CASE WHEN last_day >= :today THEN current_streak
+                          WHEN last_day = :yesterday THEN current_streak + 1
+                          ELSE 1 END,
+    longest_streak = max(longest_streak,
+                         CASE WHEN last_day >= :today THEN current_streak
+                              WHEN last_day = :yesterday THEN current_streak + 1
+                              ELSE 1 END),
+    last_day = max(last_day, :today)
+"""
+
 def add_study_log(username, subject, duration_minutes):
     try:
-        conn = get_db_connection()
-        with conn:
+        started_at = datetime.now()
+        day = started_at.date()
+        with get_connection() as conn, conn:
             conn.execute("INSERT INTO study_logs (username, subject, duration_minutes, started_at) VALUES (?, ?, ?, ?)",
-                         (username, subject, duration_minutes, datetime.now()))
-        conn.close()
+                         (username, subject, duration_minutes, started_at))
+            conn.execute("""
+                INSERT INTO study_daily (username, day, subject, minutes, sessions) VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (username, day, subject)
+                DO UPDATE SET minutes = minutes + excluded.minutes, sessions = sessions + 1
+            """, (username, day.isoformat(), subject or '', duration_minutes or 0))
+            conn.execute(_STREAK_UPSERT_SQL, {
+                'username': username,
+                'today': day.isoformat(),
+                'yesterday': (day - timedelta(days=1)).isoformat(),
+            })
         return True
     except: return False
 
+def _rebuild_study_daily(conn, username=None):
+    # username=None rebuilds every user
+    conn.execute("DELETE FROM study_daily WHERE ? IS NULL OR username = ?", (username, username))
+    conn.execute("""
+        INSERT INTO study_daily (username, day, subject, minutes, sessions)
+        SELECT username, date(started_at), coalesce(subject, ''), coalesce(sum(duration_minutes), 0), count(*)
+        FROM study_logs
+        WHERE (? IS NULL OR username = ?) AND started_at IS NOT NULL
+        GROUP BY username, date(started_at), coalesce(subject, '')
+    """, (username, username))
+
+def _rebuild_study_streaks(conn, username=None):
+    # Gaps-and-islands over study days: day - row_number is constant within a
+    # run of consecutive days. Current streak is the run ending on last_day.
+    conn.execute("DELETE FROM study_streaks WHERE ? IS NULL OR username = ?", (username, username))
+    conn.execute("""
+        WITH islands AS (
+            SELECT username, day,
+                   julianday(day) - ROW_NUMBER() OVER (PARTITION BY username ORDER BY day) AS grp
+            FROM (SELECT DISTINCT username, day FROM study_daily WHERE ? IS NULL OR username = ?)
+        ),
+        runs AS (
+            SELECT username, count(*) AS length, max(day) AS end_day FROM islands GROUP BY username, grp
+        )
+        INSERT INTO study_streaks (username, current_streak, longest_streak, last_day)
+        SELECT username,
+               (SELECT length FROM runs AS latest WHERE latest.username = runs.username
+                ORDER BY end_day DESC LIMIT 1),
+               max(length), max(end_day)
+        FROM runs GROUP BY username
+    """, (username, username))
+
+def rebuild_study_daily(username=None):
+    """Recompute the study_daily rollup and streaks from raw study_logs (all users by default)."""
+    try:
+        with get_connection() as conn, conn:
+            _rebuild_study_daily(conn, username)
+            _rebuild_study_streaks(conn, username)
+        return True
+    except Exception as e:
+        logger.error(f"Rollup Rebuild Error: {e}")
+        return False
+
+def get_subject_breakdown(username):
+    """Minutes and session count per subject, most-studied first."""
+    try:
+        with get_connection() as conn:
+            return conn.execute(
+                "SELECT nullif(subject, '') AS subject, sum(minutes) AS mins, sum(sessions) AS sessions "
+                "FROM study_daily WHERE username = ? GROUP BY subject ORDER BY mins DESC",
+                (username,)
+            ).fetchall()
+    except Exception as e:
+        logger.error(f"Subject Breakdown Error: {e}")
+        return []
+
+# One pass over the user's rows in the study_daily rollup, plus a point lookup
+# of the persisted streak, which only counts if it reaches today or yesterday.
+_USER_STATS_SQL = """
+WITH streak AS (
+    SELECT current_streak, longest_streak, last_day FROM study_streaks WHERE username = :username
+)
+SELECT
+    sum(minutes) AS total_mins,
+    sum(CASE WHEN day >= :week_start THEN minutes END) AS week_mins,
+    sum(CASE WHEN day = :today THEN minutes END) AS today_mins,
+    count(DISTINCT nullif(subject, '')) AS subjects,
+    (SELECT CASE WHEN last_day >= :yesterday THEN current_streak ELSE 0 END FROM streak) AS streak,
+    (SELECT longest_streak FROM streak) AS longest_streak
+FROM study_daily WHERE username = :username
+"""
+
 def get_user_stats(username):
     stats = {
         'streak': 0, 
+        'longest_streak': 0,
         'total_hours': 0.0, 
         'hours_week': 0.0, 
         'topics_mastered': 0,
         'daily_goal_pct': 0
     }
     try:
-        conn = get_db_connection()
-        
-        # Total Hours
-        rows = conn.execute("SELECT sum(duration_minutes) FROM study_logs WHERE username = ?", (username,)).fetchone()
-        if rows and rows[0]:
-            stats['total_hours'] = round(rows[0] / 60.0, 1)
-
-        # Weekly Hours
-        # Calculate start of week (Monday)
         today = date.today()
-        start_week = today - timedelta(days=today.weekday())
-        rows = conn.execute("SELECT sum(duration_minutes) FROM study_logs WHERE username = ? AND date(started_at) >= ?", 
-                            (username, start_week.isoformat())).fetchone()
-        if rows and rows[0]:
-            stats['hours_week'] = round(rows[0] / 60.0, 1)
-            
-        # Topics (Distinct Subjects)
-        rows = conn.execute("SELECT count(DISTINCT subject) FROM study_logs WHERE username = ?", (username,)).fetchone()
-        if rows:
-            stats['topics_mastered'] = rows[0]
-
-        # Streak Calculation
-        rows = conn.execute("SELECT DISTINCT date(started_at) as dt FROM study_logs WHERE username = ? ORDER BY dt DESC", (username,)).fetchall()
-        dates = [r['dt'] for r in rows if r['dt']]
-        
-        streak = 0
-        if dates:
-            # Check if updated today or yesterday to keep streak alive
-            today_str = today.isoformat()
-            yesterday_str = (today - timedelta(days=1)).isoformat()
-            
-            current_check = today
-            if today_str not in dates and yesterday_str in dates:
-                current_check = today - timedelta(days=1)
-                
-            # Iterate backwards
-            # Simple logic: consecutive days
-            # Actually, robust logic:
-            if dates[0] == today_str or dates[0] == yesterday_str:
-                streak = 1
-                curr_date = date.fromisoformat(dates[0])
-                for d_str in dates[1:]:
-                    d = date.fromisoformat(d_str)
-                    if (curr_date - d).days == 1:
-                        streak += 1
-                        curr_date = d
-                    else:
-                        break
-        stats['streak'] = streak
-
-        # Daily Goal %
-        # Goal: 60 mins
-        rows = conn.execute("SELECT sum(duration_minutes) FROM study_logs WHERE username = ? AND date(started_at) = ?", 
-                            (username, today.isoformat())).fetchone()
-        today_mins = rows[0] if rows and rows[0] else 0
-        stats['daily_goal_pct'] = min(int((today_mins / 60) * 100), 100)
-
-        conn.close()
+        start_week = today - timedelta(days=today.weekday())  # Monday
+        with get_connection() as conn:
+            row = conn.execute(_USER_STATS_SQL, {
+                'username': username,
+                'week_start': start_week.isoformat(),
+                'today': today.isoformat(),
+                'yesterday': (today - timedelta(days=1)).isoformat(),
+            }).fetchone()
+
+        stats['total_hours'] = round((row['total_mins'] or 0) / 60.0, 1)
+        stats['hours_week'] = round((row['week_mins'] or 0) / 60.0, 1)
+        stats['topics_mastered'] = row['subjects'] or 0
+        stats['streak'] = row['streak'] or 0
+        stats['longest_streak'] = row['longest_streak'] or 0
+        # Daily Goal: 60 mins
+        stats['daily_goal_pct'] = min(int(((row['today_mins'] or 0) / 60) * 100), 100)
     except Exception as e:
         logger.error(f"Stats Error: {e}")
         
@@ -296,38 +885,85 @@ def get_user_stats(username):
 
 def get_tasks_this_week(username):
     try:
-        conn = get_db_connection()
-        today = date.today()
-        start_week = today - timedelta(days=today.weekday())
-        end_week = start_week + timedelta(days=6)
-        
-        rows = conn.execute("""
-            SELECT count(*) FROM tasks 
-            WHERE username = ? 
-            AND date(due_date) >= ? 
-            AND date(due_date) <= ?
-        """, (username, start_week.isoformat(), end_week.isoformat())).fetchone()
-        count = rows[0] if rows else 0
-        conn.close()
+        with get_connection() as conn:
+            today = date.today()
+            start_week = today - timedelta(days=today.weekday())
+            end_week = start_week + timedelta(days=6)
+
+            rows = conn.execute("""
+                SELECT count(*) FROM tasks 
+                WHERE username = ? 
+                AND due_date >= ? 
+                AND due_date < ?
+            """, (username, *_day_range(start_week, end_week))).fetchone()
+            count = rows[0] if rows else 0
         return count
     except Exception as e:
         logger.error(f"Weekly Tasks Error: {e}")
         return 0
 
+# SQL expression and Python helpers for each activity bucket size:
+# (bucket key SQL, align a date to its bucket start, next bucket start, label format)
+_BUCKETS = {
+    'day': ("day",
+            lambda d: d,
+            lambda d: d + timedelta(days=1),
+            "%b %d"),
+    'week': ("date(day, 'weekday 0', '-6 days')",   # Monday of that week
+             lambda d: d - timedelta(days=d.weekday()),
+             lambda d: d + timedelta(days=7),
+             "%b %d"),
+    'month': ("strftime('%Y-%m-01', day)",
+              lambda d: d.replace(day=1),
+              lambda d: (d.replace(day=28) + timedelta(days=4)).replace(day=1),
+              "%b %Y"),
+}
+
+def get_activity_series(username, start, end, bucket='day'):
+    """Study hours per bucket ('day', 'week' or 'month') for dates start..end inclusive.
+
+    Returns a list of {'start': date, 'label': str, 'hours': float}, one entry per
+    bucket in order, with empty buckets filled in as 0. Uses a single GROUP BY
+    over the user's study_daily rows in range.
+    """
+    key_sql, align, step, label_fmt = _BUCKETS[bucket]
+    first = align(start)
+    totals = {}
+    try:
+        with get_connection() as conn:
+            rows = conn.execute(
+                f"SELECT {key_sql} AS bucket, sum(minutes) AS mins FROM study_daily "
+                "WHERE username = ? AND day >= ? AND day < ? GROUP BY bucket",
+                (username, *_day_range(first, end))
+            ).fetchall()
+        totals = {r['bucket']: r['mins'] or 0 for r in rows}
+    except Exception as e:
+        logger.error(f"Activity Series Error: {e}")
+
+    series = []
+    d = first
+    while d <= end:
+        mins = totals.get(d.isoformat(), 0)
+        series.append({'start': d, 'label': d.strftime(label_fmt), 'hours': round(mins / 60.0, 1)})
+        d = step(d)
+    return series
+
 def get_weekly_activity(username):
     # Returns last 7 days activity
-    activity = []
-    try:
-        conn = get_db_connection()
-        today = date.today()
-        # Last 7 days including today
-        for i in range(6, -1, -1):
-            d = today - timedelta(days=i)
-            rows = conn.execute("SELECT sum(duration_minutes) FROM study_logs WHERE username = ? AND date(started_at) = ?", 
-                                (username, d.isoformat())).fetchone()
-            mins = rows[0] if rows and rows[0] else 0
-            day_label = d.strftime("%a") # Mon, Tue...
-            activity.append({'day': day_label, 'hours': round(mins/60.0, 1)})
-        conn.close()
-    except: pass
-    return activity
+    today = date.today()
+    series = get_activity_series(username, today - timedelta(days=6), today)
+    return [{'day': b['start'].strftime("%a"), 'hours': b['hours']} for b in series]  # Mon, Tue...
+
+if __name__ == "__main__":
+    # Maintenance entry points, e.g. python database.py rebuild-rollups [username]
+    import sys
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild-rollups":
+        init_all_tables()
+        ok = rebuild_study_daily(sys.argv[2] if len(sys.argv) > 2 else None)
+        sys.exit(0 if ok else 1)
+    if len(sys.argv) == 2 and sys.argv[1] == "gc-documents":
+        init_all_tables()
+        print(f"Removed {collect_orphan_documents()} unreferenced documents")
+        sys.exit(0)
+    print("usage: python database.py rebuild-rollups [username] | gc-documents")
+    sys.exit(2)
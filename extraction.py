@@ -0,0 +1,140 @@
+"""Text extraction from uploaded documents.
+
+``iter_text`` yields a document's text page by page (PDF) or paragraph by
+paragraph (DOCX, TXT), so callers can start work before the last page is
+parsed and the result is joined once instead of grown with ``+=``. Large PDFs
+are split into page ranges and parsed in a process pool, with the ranges
+still yielded in page order.
+"""
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "500"))
+# PDFs with at least this many pages are parsed in parallel
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 16
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ExtractionLimitError(ValueError):
+    """The upload exceeds the size limit; the message is user-facing."""
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing as mp
+            # spawn: never fork a process that may hold torch threads
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=mp.get_context("spawn"))
+        return _pool
+
+
+def _pdf_page_range(path, start, stop):
+    """Worker task: (text, seconds) for pages [start, stop) of the PDF at path."""
+    import fitz  # PyMuPDF
+    results = []
+    with fitz.open(path, filetype="pdf") as doc:
+        for number in range(start, stop):
+            began = time.perf_counter()
+            text = doc[number].get_text()
+            results.append((text, time.perf_counter() - began))
+    return results
+
+
+def _iter_pdf(data, stats):
+    import fitz  # PyMuPDF
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        pages = min(page_count, MAX_PAGES)
+        if page_count > MAX_PAGES:
+            stats['truncated'] = True
+            logger.warning(f"PDF has {page_count} pages; extracting the first {MAX_PAGES}")
+        if pages < PARALLEL_MIN_PAGES or EXTRACT_WORKERS < 2:
+            for number in range(pages):
+                began = time.perf_counter()
+                text = doc[number].get_text()
+                stats['unit_seconds'].append(time.perf_counter() - began)
+                yield text
+            return
+
+    # Workers read the file from disk; each task then pickles a path, not the whole upload
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    ranges = [(start, min(start + PAGES_PER_TASK, pages)) for start in range(0, pages, PAGES_PER_TASK)]
+    futures = []
+    try:
+        futures = [_get_pool().submit(_pdf_page_range, path, start, stop) for start, stop in ranges]
+        for future in futures:  # in page order, as each range completes
+            for text, seconds in future.result():
+                stats['unit_seconds'].append(seconds)
+                yield text
+    finally:
+        for future in futures:
+            future.cancel()  # consumer stopped early
+        wait(futures)  # ranges already running still have the file open
+        os.remove(path)
+
+
+def _iter_docx(data, stats):
+    import docx
+    document = docx.Document(io.BytesIO(data))
+    for paragraph in document.paragraphs:
+        began = time.perf_counter()
+        text = paragraph.text + "\n"
+        stats['unit_seconds'].append(time.perf_counter() - began)
+        yield text
+
+
+def _iter_txt(data, stats):
+    began = time.perf_counter()
+    text = data.decode('utf-8')
+    stats['unit_seconds'].append(time.perf_counter() - began)
+    yield text
+
+
+_EXTRACTORS = {'.pdf': _iter_pdf, '.docx': _iter_docx, '.txt': _iter_txt}
+
+
+def iter_text(name, data, stats=None):
+    """Yield the text of an uploaded file in reading order.
+
+    stats, if given, is filled with 'unit_seconds' (parse time per page or
+    paragraph), 'elapsed_s' and 'truncated' (page limit reached). Raises
+    ExtractionLimitError for uploads over MAX_UPLOAD_BYTES.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(unit_seconds=[], elapsed_s=0.0, truncated=False)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ExtractionLimitError(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)}MB.")
+    extractor = _EXTRACTORS.get(os.path.splitext(name.lower())[1])
+    if extractor is None:
+        return
+    began = time.perf_counter()
+    try:
+        yield from extractor(data, stats)
+    finally:
+        stats['elapsed_s'] = time.perf_counter() - began
+        units = stats['unit_seconds']
+        if units:
+            logger.info(f"Extracted {len(units)} units from {name} in {stats['elapsed_s']:.2f}s "
+                        f"(mean {sum(units) / len(units) * 1000:.1f}ms, slowest {max(units) * 1000:.1f}ms)")
+
+
+def extract_text(name, data, stats=None):
+    """Whole text of an uploaded file (see iter_text)."""
+    return "".join(iter_text(name, data, stats))
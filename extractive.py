@@ -0,0 +1,113 @@
+"""Extractive summarization: pick the most central sentences of the text.
+
+Sentences are embedded as TF-IDF vectors and ranked with TextRank (PageRank
+over the cosine-similarity graph). Everything is a handful of sparse and
+dense matrix operations, so a typical document takes milliseconds on CPU and
+no model has to be loaded. Used for the "Instant" mode, as a fallback when
+the abstractive model is unavailable, and to trim long inputs to a token
+budget before the abstractive pass.
+"""
+import logging
+import math
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+# Above this many sentences the n x n similarity matrix gets expensive;
+# rank by similarity to the document centroid instead (linear in n).
+MAX_TEXTRANK_SENTENCES = 1500
+# Rough words per model token, to honour token-based length settings
+WORDS_PER_TOKEN = 0.75
+
+
+def _tfidf(sentences):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    return vectorizer.fit_transform(sentences)  # rows are L2-normalized
+
+
+def _textrank(matrix):
+    import numpy as np
+    similarity = (matrix @ matrix.T).toarray()
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    n = similarity.shape[0]
+    # Sentences sharing no terms with the rest link uniformly (no rank sink)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / n), where=row_sums > 0)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def _centroid_scores(matrix):
+    import numpy as np
+    centroid = np.asarray(matrix.mean(axis=0)).ravel()
+    return np.asarray(matrix @ centroid).ravel()
+
+
+def rank_sentences(sentences):
+    """Centrality score per sentence (higher is more representative)."""
+    if len(sentences) < 3:
+        return [1.0] * len(sentences)
+    try:
+        matrix = _tfidf(sentences)
+    except ValueError:  # nothing but stop words
+        return [1.0] * len(sentences)
+    scores = _textrank(matrix) if len(sentences) <= MAX_TEXTRANK_SENTENCES else _centroid_scores(matrix)
+    return scores.tolist()
+
+
+def select_within_budget(sentences, token_counts, budget):
+    """Indices of the top-ranked sentences whose token counts fit budget, in original order."""
+    try:
+        scores = rank_sentences(sentences)
+    except ImportError:
+        logger.warning("scikit-learn not installed. Keeping the leading sentences instead.")
+        scores = [-i for i in range(len(sentences))]
+    chosen, used = [], 0
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if used + token_counts[i] <= budget:
+            chosen.append(i)
+            used += token_counts[i]
+    return sorted(chosen)
+
+
+def summarize(text, max_length=150, ratio=0.3):
+    """Pick top-ranked sentences, in their original order.
+
+    The result holds at most ratio of the sentences and at most max_length
+    model tokens' worth of words. Sentences longer than that are split at
+    word boundaries first, so unpunctuated text is cut down too.
+    """
+    from utils import split_sentences
+    word_budget = max(1, int(max_length * WORDS_PER_TOKEN))
+    sentences = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        sentences.extend(" ".join(words[i:i + word_budget]) for i in range(0, len(words), word_budget))
+    if len(sentences) <= 1:
+        return sentences[0] if sentences else ""
+    try:
+        scores = rank_sentences(sentences)
+    except ImportError:
+        logger.warning("scikit-learn not installed. Using the leading sentences instead.")
+        scores = [-i for i in range(len(sentences))]
+
+    max_sentences = max(1, math.ceil(len(sentences) * ratio))
+    chosen, words = [], 0
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if len(chosen) >= max_sentences:
+            break
+        n = len(sentences[i].split())
+        if words + n > word_budget:
+            continue  # a shorter, lower-ranked sentence may still fit
+        chosen.append(i)
+        words += n
+    return " ".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,496 @@
+"""Summarization model hosting.
+
+The model can run in-process (``build_pipeline``) or in a dedicated worker
+process (``InferenceClient``) that serves every Streamlit session. The worker
+collects requests from all sessions into dynamic micro-batches, so concurrent
+users share forward passes instead of fighting over the same torch threads.
+
+With SUMMARIZER_QUANTIZE=1 the model's Linear layers run as dynamic int8 on
+CPU. The converted model is cached on disk so only the first start pays for
+the conversion.
+
+Models and tokenizers are read from the local Hugging Face cache without
+contacting the Hub; only a model that is not cached yet is downloaded.
+
+Loaded models live in ``registry`` (a ``ModelRegistry``), which unloads them
+after MODEL_IDLE_TTL_S without use, or sooner when the process RSS exceeds
+MODEL_RSS_BUDGET_MB, and reloads them on the next request.
+"""
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Worker tuning
+WORKER_MAX_BATCH = int(os.getenv("WORKER_MAX_BATCH", "8"))
+WORKER_MAX_WAIT_MS = int(os.getenv("WORKER_MAX_WAIT_MS", "50"))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "64"))
+# How long a caller waits for queue space before giving up (backpressure)
+QUEUE_PUT_TIMEOUT_S = 2.0
+REQUEST_TIMEOUT_S = 600.0
+# How often the listener checks that the worker is still alive while idle
+LIVENESS_CHECK_S = 1.0
+
+# Dynamic int8 quantization of Linear layers (CPU only)
+SUMMARIZER_QUANTIZE = os.getenv("SUMMARIZER_QUANTIZE", "0") == "1"
+QUANTIZED_CACHE_DIR = os.getenv(
+    "QUANTIZED_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_cache"))
+
+# Model eviction; 0 disables either rule
+MODEL_IDLE_TTL_S = int(os.getenv("MODEL_IDLE_TTL_S", "1800"))
+MODEL_RSS_BUDGET_MB = int(os.getenv("MODEL_RSS_BUDGET_MB", "0"))
+EVICTION_CHECK_INTERVAL_S = 30
+
+
+class InferenceBusy(RuntimeError):
+    """The worker queue is full; the caller should retry later."""
+
+
+def _local_first(load, model_name):
+    """Call load(local_files_only=True), falling back to a download if the model isn't cached."""
+    try:
+        return load(local_files_only=True)
+    except OSError:
+        logger.info(f"{model_name} is not in the local cache; downloading")
+        return load(local_files_only=False)
+
+
+def load_tokenizer(model_name):
+    from transformers import AutoTokenizer
+    return _local_first(lambda **kw: AutoTokenizer.from_pretrained(model_name, **kw), model_name)
+
+
+def build_pipeline(model_name, quantize=None):
+    """Load the HuggingFace summarization pipeline, optionally int8-quantized."""
+    from transformers import pipeline
+    if quantize is None:
+        quantize = SUMMARIZER_QUANTIZE
+    if not quantize:
+        # model_kwargs also reach the config and tokenizer loaders
+        return _local_first(lambda **kw: pipeline("summarization", model=model_name, model_kwargs=kw),
+                            model_name)
+    return pipeline("summarization", model=load_quantized_model(model_name),
+                    tokenizer=load_tokenizer(model_name))
+
+
+def _quantized_cache_path(model_name):
+    # Pickled modules are tied to the library versions that produced them
+    import torch
+    import transformers
+    safe_name = model_name.replace("/", "--")
+    return os.path.join(QUANTIZED_CACHE_DIR,
+                        f"{safe_name}-int8-torch{torch.__version__}-tf{transformers.__version__}.pt")
+
+
+def load_quantized_model(model_name):
+    """Return the model with dynamic int8 Linear layers, from the disk cache if present."""
+    import torch
+    path = _quantized_cache_path(model_name)
+    if os.path.exists(path):
+        try:
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            logger.info(f"Loaded quantized model from {path}")
+            return model.eval()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable quantized model cache {path}: {e}")
+
+    from transformers import AutoModelForSeq2SeqLM
+    start = time.perf_counter()
+    model = _local_first(lambda **kw: AutoModelForSeq2SeqLM.from_pretrained(model_name, **kw), model_name).eval()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    logger.info(f"Quantized {model_name} to int8 in {time.perf_counter() - start:.1f}s")
+
+    try:
+        os.makedirs(QUANTIZED_CACHE_DIR, exist_ok=True)
+        # Write then rename so a concurrent start never reads a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not cache quantized model: {e}")
+    return model
+
+
+def _worker_main(requests, responses, model_name, max_batch, max_wait_s):
+    """Worker process loop: gather requests into micro-batches and run them."""
+    try:
+        summarizer = build_pipeline(model_name)
+    except Exception as e:
+        responses.put(("error", None, f"Model load failed: {e}", 0))
+        return
+    responses.put(("ready", None, None, 0))
+
+    stopping = False
+    while not stopping:
+        first = requests.get()
+        if first is None:
+            break
+        batch = [first]
+        deadline = time.monotonic() + max_wait_s
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        # Only requests with identical generation settings can share a pass
+        groups = {}
+        for req_id, text, gen_kwargs in batch:
+            groups.setdefault(tuple(sorted(gen_kwargs.items())), []).append((req_id, text))
+        for kw_key, items in groups.items():
+            items.sort(key=lambda item: len(item[1]))  # less padding per batch
+            try:
+                outputs = summarizer([text for _, text in items], batch_size=len(items), **dict(kw_key))
+                for (req_id, _), out in zip(items, outputs):
+                    out = out[0] if isinstance(out, list) else out
+                    responses.put((req_id, True, out['summary_text'], len(items)))
+            except Exception as e:
+                for req_id, _ in items:
+                    responses.put((req_id, False, str(e), len(items)))
+
+
+class InferenceClient:
+    """Pipeline-compatible front end for the worker process.
+
+    Calling the client with a list of texts behaves like calling the HF
+    pipeline: it returns ``[{'summary_text': ...}, ...]`` in input order.
+    Each text is queued separately so the worker can batch it with requests
+    from other sessions.
+    """
+
+    def __init__(self, model_name, max_batch=WORKER_MAX_BATCH, max_wait_ms=WORKER_MAX_WAIT_MS,
+                 queue_size=WORKER_QUEUE_SIZE):
+        self.model_name = model_name
+        self._max_batch = max_batch
+        self._max_wait_s = max_wait_ms / 1000
+        self._queue_size = queue_size
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._tokenizer = None
+        self._latencies = deque(maxlen=500)
+        self._batch_sizes = deque(maxlen=500)
+        self._completed = 0
+        self._rejected = 0
+        self._start()
+
+    def _start(self):
+        ctx = mp.get_context("spawn")  # never fork a process holding torch threads
+        self._requests = ctx.Queue(maxsize=self._queue_size)
+        self._responses = ctx.Queue()
+        self._ready.clear()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(self._requests, self._responses, self.model_name, self._max_batch, self._max_wait_s),
+            name="summarizer-worker",
+            daemon=True,
+        )
+        self._process.start()
+        self._listener = threading.Thread(target=self._listen, args=(self._responses, self._process),
+                                          name="summarizer-listener", daemon=True)
+        self._listener.start()
+        logger.info(f"Started summarizer worker (pid {self._process.pid})")
+
+    def _listen(self, responses, process):
+        while True:
+            try:
+                req_id, ok, payload, batch_size = responses.get(timeout=LIVENESS_CHECK_S)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Died mid-batch (e.g. OOM-killed): fail callers now, not at REQUEST_TIMEOUT_S
+                if process is self._process:
+                    self._fail_pending("Summarizer worker exited")
+                return
+            except (EOFError, OSError):
+                return
+            if req_id == "ready":
+                self._ready.set()
+                continue
+            if req_id == "stop":
+                return
+            if req_id == "error":
+                logger.error(payload)
+                self._fail_pending(payload)
+                continue
+            with self._lock:
+                entry = self._pending.pop(req_id, None)
+            if entry is None:
+                continue
+            future, submitted = entry
+            self._latencies.append(time.monotonic() - submitted)
+            self._batch_sizes.append(batch_size)
+            self._completed += 1
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _fail_pending(self, message):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.set_exception(RuntimeError(message))
+
+    def _discard(self, futures):
+        """Forget futures whose requests will not be waited on; late results are dropped."""
+        futures = set(futures)
+        with self._lock:
+            for req_id in [r for r, (f, _) in self._pending.items() if f in futures]:
+                del self._pending[req_id]
+        for future in futures:
+            future.cancel()
+
+    def _stop_listener(self):
+        # The listener blocks on this worker's response queue until told to stop
+        self._responses.put(("stop", None, None, 0))
+        self._listener.join(timeout=5)
+
+    def _ensure_alive(self):
+        with self._restart_lock:
+            if self._process.is_alive():
+                return
+            logger.warning("Summarizer worker exited; restarting")
+            self._fail_pending("Summarizer worker exited")
+            self._stop_listener()
+            self._process.join(timeout=1)
+            self._start()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    @property
+    def tokenizer(self):
+        # Only the tokenizer lives in this process, for chunking
+        if self._tokenizer is None:
+            self._tokenizer = load_tokenizer(self.model_name)
+        return self._tokenizer
+
+    def submit(self, text, **gen_kwargs):
+        """Queue one text and return a Future for its summary string."""
+        self._ensure_alive()
+        req_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[req_id] = (future, time.monotonic())
+        try:
+            self._requests.put((req_id, text, gen_kwargs), timeout=QUEUE_PUT_TIMEOUT_S)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(req_id, None)
+            self._rejected += 1
+            raise InferenceBusy("Summarizer queue is full")
+        return future
+
+    def __call__(self, inputs, batch_size=None, **gen_kwargs):
+        # batch_size is accepted for pipeline compatibility; the worker decides
+        single = isinstance(inputs, str)
+        futures = []
+        try:
+            for text in ([inputs] if single else inputs):
+                futures.append(self.submit(text, **gen_kwargs))
+            results = [{'summary_text': f.result(timeout=REQUEST_TIMEOUT_S)} for f in futures]
+        except BaseException:
+            # Busy or timed out part way: don't leave the rest pending
+            self._discard(futures)
+            raise
+        return results[0:1] if single else results
+
+    def stats(self):
+        """Queue depth, throughput counters and latency of recent requests."""
+        latencies = sorted(self._latencies)
+        return {
+            'worker_alive': self._process.is_alive(),
+            'ready': self.ready,
+            'queue_depth': len(self._pending),
+            'completed': self._completed,
+            'rejected': self._rejected,
+            'avg_latency_s': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'p95_latency_s': round(latencies[int(len(latencies) * 0.95) - 1], 3) if latencies else 0.0,
+            'avg_batch_size': round(sum(self._batch_sizes) / len(self._batch_sizes), 2) if self._batch_sizes else 0.0,
+        }
+
+    def close(self):
+        """Ask the worker to finish its current batch and exit."""
+        try:
+            self._requests.put(None, timeout=QUEUE_PUT_TIMEOUT_S)
+        except queue.Full:
+            self._process.terminate()
+        self._process.join(timeout=10)
+        self._stop_listener()
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None if it can't be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _release_memory():
+    import gc
+    gc.collect()
+    # glibc keeps freed tensor memory in its arenas; hand it back to the OS
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class _Entry:
+    def __init__(self):
+        self.model = None
+        self.lock = threading.Lock()  # held while loading
+        self.last_used = 0.0
+        self.in_use = 0
+        self.loads = 0
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models with idle and memory-based eviction.
+
+    ``use(name, loader)`` lends the model for the duration of a ``with``
+    block, loading it with ``loader()`` if needed (a loader may return None
+    when the model is unavailable). A background thread unloads
+    models that nobody is using once they have been idle for idle_ttl_s, or
+    least recently used first while the process is over rss_budget_mb.
+    """
+
+    def __init__(self, idle_ttl_s=MODEL_IDLE_TTL_S, rss_budget_mb=MODEL_RSS_BUDGET_MB,
+                 check_interval_s=EVICTION_CHECK_INTERVAL_S):
+        self.idle_ttl_s = idle_ttl_s
+        self.rss_budget_mb = rss_budget_mb
+        self._check_interval_s = check_interval_s
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.evictions = deque(maxlen=50)
+
+    def _entry(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry()
+            if self._reaper is None and (self.idle_ttl_s or self.rss_budget_mb):
+                self._reaper = threading.Thread(target=self._reap_forever, name="model-reaper", daemon=True)
+                self._reaper.start()
+            return entry
+
+    @contextmanager
+    def use(self, name, loader):
+        """Lend the named model, loading it first if it isn't resident."""
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.model is None:
+                start = time.perf_counter()
+                entry.model = loader()
+                if entry.model is not None:  # None means unavailable; retried on next use
+                    entry.loads += 1
+                    logger.info(f"Loaded model {name} in {time.perf_counter() - start:.1f}s")
+            entry.in_use += 1
+            model = entry.model
+        try:
+            yield model
+        finally:
+            with entry.lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def get(self, name, loader):
+        """Return the model without holding a lease (it may be evicted once idle)."""
+        with self.use(name, loader) as model:
+            return model
+
+    def peek(self, name):
+        """The model if it is resident, without loading it or counting as use."""
+        entry = self._entries.get(name)
+        return entry.model if entry else None
+
+    def evict(self, name, reason="manual"):
+        """Unload a model unless it is in use. Returns True if it was unloaded."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return False
+        with entry.lock:
+            if entry.model is None or entry.in_use:
+                return False
+            model, entry.model = entry.model, None
+        before = current_rss_mb()
+        if hasattr(model, "close"):
+            model.close()  # worker client: stop the process that holds the weights
+        del model
+        _release_memory()
+        after = current_rss_mb()
+        self.evictions.append({'model': name, 'reason': reason, 'rss_before_mb': before,
+                               'rss_after_mb': after, 'at': time.time()})
+        if before is not None and after is not None:
+            logger.info(f"Evicted model {name} ({reason}): RSS {before:.0f} MB -> {after:.0f} MB")
+        else:
+            logger.info(f"Evicted model {name} ({reason})")
+        return True
+
+    def check(self):
+        """Apply the idle TTL and memory budget once."""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.items())
+        idle = sorted(((e.last_used, name) for name, e in entries if e.model is not None and not e.in_use))
+        if self.idle_ttl_s:
+            for last_used, name in idle:
+                if now - last_used >= self.idle_ttl_s:
+                    self.evict(name, reason=f"idle {now - last_used:.0f}s")
+        if self.rss_budget_mb:
+            for _, name in idle:
+                rss = current_rss_mb()
+                if rss is None or rss <= self.rss_budget_mb:
+                    break
+                self.evict(name, reason=f"RSS {rss:.0f} MB over {self.rss_budget_mb} MB budget")
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(self._check_interval_s)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model eviction check failed: {e}")
+
+    def stats(self):
+        """Residency, use and load counts per model, recent evictions and current RSS."""
+        now = time.monotonic()
+        models = {
+            name: {'loaded': e.model is not None, 'in_use': e.in_use, 'loads': e.loads,
+                   'idle_s': round(now - e.last_used, 1) if e.last_used else None}
+            for name, e in list(self._entries.items())
+        }
+        return {'models': models, 'evictions': list(self.evictions), 'rss_mb': current_rss_mb(),
+                'idle_ttl_s': self.idle_ttl_s, 'rss_budget_mb': self.rss_budget_mb}
+
+
+registry = ModelRegistry()
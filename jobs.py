@@ -0,0 +1,104 @@
+"""Background summarization jobs.
+
+Submitting a job stores it in the ``summary_jobs`` table and hands it to a
+process-wide thread pool, so the model run survives Streamlit reruns and page
+navigation. Pages poll job status from the database; finished results are
+written to ``summaries``. Live jobs are generated with ``utils.stream_summary``
+and also save the summary written so far, so the page can show it growing.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+import utils
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Jobs run concurrently; with the in-process model, 1 avoids thread contention
+SUMMARY_JOB_WORKERS = int(os.getenv("SUMMARY_JOB_WORKERS", "1"))
+# Live jobs save their partial summary at most this often (and after every chunk)
+LIVE_SAVE_INTERVAL_S = 0.5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SUMMARY_JOB_WORKERS, thread_name_prefix="summary-job")
+            # Resume jobs a previous server process left unfinished
+            for job_id in database.get_unfinished_summary_job_ids():
+                _executor.submit(run_summary_job, job_id)
+        return _executor
+
+
+def resume_unfinished_jobs():
+    """Start the worker pool if needed, picking up jobs left queued or running by a
+    previous server process. Cheap after the first call; safe to call on every rerun."""
+    _get_executor()
+
+
+def submit_summary_job(username, text, title, max_length, min_length, preset=utils.DEFAULT_PRESET, live=False):
+    """Queue a summarization and return the job id (None if it could not be queued).
+
+    With live, the summary written so far is kept in the job's partial_summary."""
+    executor = _get_executor()
+    job_id = database.create_summary_job(username, title, text, max_length, min_length, preset, live)
+    if job_id is not None:
+        executor.submit(run_summary_job, job_id)
+    return job_id
+
+
+def run_summary_job(job_id):
+    """Run one job to completion, recording progress and the outcome."""
+    job = database.get_summary_job(job_id)
+    if not job or job['status'] not in ('queued', 'running'):
+        return
+    try:
+        text = database.get_summary_job_text(job_id)
+        database.update_summary_job(job_id, status='running', progress_done=0)
+
+        if job['live']:
+            summary, ok = _stream_job(job_id, text, job)
+        else:
+            def progress(done, total):
+                database.update_summary_job(job_id, progress_done=done, progress_total=total)
+
+            summary, ok = utils.summarize_text(text, max_length=job['max_length'], min_length=job['min_length'],
+                                               preset=job['preset'], progress=progress)
+        if not ok:
+            database.fail_summary_job(job_id, summary)
+            return
+
+        keywords = utils.extract_keywords(text)
+        display_summary = f"{summary}\n\n**Key Topics:** {', '.join(keywords)}" if keywords else summary
+        if not database.complete_summary_job(job_id, display_summary):
+            database.fail_summary_job(job_id, "Could not save summary to history.")
+    except Exception as e:
+        logger.error(f"Summary Job {job_id} Error: {e}")
+        database.fail_summary_job(job_id, "Error generating summary.")
+
+
+def _stream_job(job_id, text, job):
+    """Generate a live job's summary, saving the text written so far as it grows."""
+    written, chunks, saved_at = [], 0, 0.0
+    for kind, value in utils.stream_summary(text, job['max_length'], job['min_length'], job['preset']):
+        if kind == 'final':
+            return value, True
+        if kind == 'error':
+            return value, False
+        if kind == 'chunk':
+            chunks += 1
+            written.append("\n\n")
+        else:
+            written.append(value)
+        if kind == 'chunk' or time.monotonic() - saved_at >= LIVE_SAVE_INTERVAL_S:
+            database.update_summary_job(job_id, progress_done=chunks, partial_summary="".join(written))
+            saved_at = time.monotonic()
+    return "Error generating summary.", False
@@ -54,9 +54,9 @@ st.markdown("""
 st.markdown("<br>", unsafe_allow_html=True)
 
 # --- Fetch Data ---
-tasks = database.get_tasks(username)
-completed_tasks = [t for t in tasks if t['completed']]
-upcoming_tasks  = [t for t in tasks if not t['completed']]
+upcoming_tasks  = database.get_tasks_in_range(username, completed=False)
+completed_tasks = database.get_tasks_in_range(username, completed=True)
+total_tasks     = len(upcoming_tasks) + len(completed_tasks)
 weekly_count    = database.get_tasks_this_week(username)
 
 # --- Stats Row ---
@@ -76,7 +76,7 @@ def stat_box(col, label, value, icon, bg_color, icon_color):
 </div>
 """, unsafe_allow_html=True)
 
-stat_box(s1, "Total Tasks",  len(tasks),           "📖", "#eff6ff", "#2563eb")
+stat_box(s1, "Total Tasks",  total_tasks,          "📖", "#eff6ff", "#2563eb")
 stat_box(s2, "Completed",    len(completed_tasks),  "✅", "#f0fdf4", "#16a34a")
 stat_box(s3, "Upcoming",     len(upcoming_tasks),   "🕒", "#fff7ed", "#ea580c")
 stat_box(s4, "This Week",    weekly_count,          "📅", "#faf5ff", "#9333ea")
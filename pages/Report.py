@@ -2,7 +2,7 @@ import streamlit as st
 import database
 import utils
 from components.navbar import render_navbar
-from datetime import datetime
+from datetime import datetime, date, timedelta
 
 # --- Page Setup ---
 st.set_page_config(page_title="Study Report", page_icon="📊", layout="wide", initial_sidebar_state="collapsed")
@@ -24,6 +24,19 @@ render_navbar(active_page="Report")
 stats = database.get_user_stats(username)
 weekly = database.get_weekly_activity(username)
 
+def months_ago(d, n):
+    """First day of the month n months before d's month."""
+    y, m = divmod(d.year * 12 + d.month - 1 - n, 12)
+    return date(y, m + 1, 1)
+
+# Chart range -> (first day from today, bucket, description); None reuses `weekly`
+ACTIVITY_RANGES = {
+    "Last 7 Days": (None, 'day', "last 7 days"),
+    "Last 30 Days": (lambda t: t - timedelta(days=29), 'day', "last 30 days"),
+    "Last 12 Weeks": (lambda t: t - timedelta(weeks=11), 'week', "last 12 weeks"),
+    "Last 12 Months": (lambda t: months_ago(t, 11), 'month', "last 12 months"),
+}
+
 # --- Page Header ---
 c_head, c_btn = st.columns([0.75, 0.25])
 with c_head:
@@ -47,6 +60,7 @@ with c_btn:
         f"Hours This Week       : {stats['hours_week']}h",
         f"Subjects Covered      : {stats['topics_mastered']}",
         f"Current Streak        : {stats['streak']} days",
+        f"Longest Streak        : {stats['longest_streak']} days",
         "",
         "=== Weekly Breakdown ===",
     ]
@@ -87,7 +101,7 @@ def stat_card(col, title, value, badge_text, badge_color, icon, bg_gradient):
 stat_card(s1, "Daily Goal",    f"{stats['daily_goal_pct']}%", "Today",    "#bfdbfe", "🎯", "linear-gradient(135deg, #eff6ff, #ecfeff)")
 stat_card(s2, "Total Hours",   f"{stats['total_hours']}h",   "All Time", "#bbf7d0", "🕒", "linear-gradient(135deg, #f0fdf4, #ecfdf5)")
 stat_card(s3, "Subjects",      str(stats['topics_mastered']), "Active",  "#e9d5ff", "📖", "linear-gradient(135deg, #faf5ff, #fdf4ff)")
-stat_card(s4, "Streak",        f"{stats['streak']}d",        "Days",     "#fed7aa", "🏆", "linear-gradient(135deg, #fff7ed, #fef2f2)")
+stat_card(s4, "Streak",        f"{stats['streak']}d",        f"Best {stats['longest_streak']}d", "#fed7aa", "🏆", "linear-gradient(135deg, #fff7ed, #fef2f2)")
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -95,27 +109,35 @@ st.markdown("<br>", unsafe_allow_html=True)
 col_main, col_side = st.columns([2.2, 1])
 
 with col_main:
-    # Weekly Activity Chart
-    max_h = max([d['hours'] for d in weekly], default=0)
+    # Activity Chart — one range query regardless of how many bars are shown
+    range_choice = st.selectbox("Activity range", list(ACTIVITY_RANGES), label_visibility="collapsed")
+    range_start, bucket, range_text = ACTIVITY_RANGES[range_choice]
+    if range_start is None:
+        activity = [{'label': d['day'], 'hours': d['hours']} for d in weekly]
+    else:
+        today = date.today()
+        activity = database.get_activity_series(username, range_start(today), today, bucket)
+
+    max_h = max([d['hours'] for d in activity], default=0)
     if max_h == 0:
         max_h = 1
 
     html_bars = ""
-    for m in weekly:
+    for m in activity:
         h_pct = max((m['hours'] / max_h) * 100, 2)
         label = f"{m['hours']}h" if m['hours'] > 0 else ""
         html_bars += f"""
 <div class="bar-column">
 <div style="font-size:0.7rem; color:#64748b; margin-bottom:2px;">{label}</div>
 <div class="bar-visual" style="height:{h_pct}%; background:linear-gradient(to top, #2563eb, #6366f1);"></div>
-<div class="bar-label">{m['day']}</div>
+<div class="bar-label">{m['label']}</div>
 </div>
 """
 
     st.markdown(f"""
 <div class="ui-card">
 <h3>📈 Activity Analysis</h3>
-<p>Study distribution over the last 7 days</p>
+<p>Study distribution over the {range_text}</p>
 <div class="bar-chart-container" style="height:180px; width:100%;">
 {html_bars}
 </div>
@@ -124,13 +146,7 @@ with col_main:
 
     # Subject breakdown table
     try:
-        conn = database.get_db_connection()
-        rows = conn.execute(
-            "SELECT subject, sum(duration_minutes) as mins, count(*) as sessions "
-            "FROM study_logs WHERE username = ? GROUP BY subject ORDER BY mins DESC",
-            (username,)
-        ).fetchall()
-        conn.close()
+        rows = database.get_subject_breakdown(username)
 
         if rows:
             st.markdown("""
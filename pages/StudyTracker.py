@@ -183,13 +183,7 @@ with col_main:
 """, unsafe_allow_html=True)
 
     try:
-        conn = database.get_db_connection()
-        rows = conn.execute(
-            "SELECT subject, sum(duration_minutes) as mins FROM study_logs "
-            "WHERE username = ? GROUP BY subject ORDER BY mins DESC",
-            (username,)
-        ).fetchall()
-        conn.close()
+        rows = database.get_subject_breakdown(username)
 
         if not rows:
             st.info("Log study sessions with different subjects to see your progress breakdown here!")
@@ -1,5 +1,6 @@
 import streamlit as st
 import database
+import jobs
 import utils
 from components.navbar import render_navbar
 
@@ -22,6 +23,17 @@ if "summary_result" not in st.session_state:
     st.session_state.summary_result = None
 if "summary_error" not in st.session_state:
     st.session_state.summary_error = None
+# Keyset cursors for the history list; the last entry is the current page's cursor
+if "summary_cursors" not in st.session_state:
+    st.session_state.summary_cursors = [None]
+
+# Jobs seen queued/running on the last poll; one disappearing means it finished
+if "active_job_ids" not in st.session_state:
+    st.session_state.active_job_ids = set()
+
+SUMMARIES_PER_PAGE = 5
+# Short enough for live output to read as it is written
+JOB_POLL_SECONDS = 1
 
 
 def delete_summary_action(sid):
@@ -33,39 +45,122 @@ def delete_summary_action(sid):
 
 def delete_all_summaries_action():
     if database.delete_all_summaries(st.session_state.username):
+        st.session_state.summary_cursors = [None]
         st.toast("✅ All summaries cleared")
     else:
         st.error("Failed to clear history.")
 
 
-def run_summarization(input_text, title, length_pct):
-    """Run the AI summarization and save result. Called inline (not as callback)."""
+def older_summaries_action(cursor):
+    st.session_state.summary_cursors.append(cursor)
+
+
+def newer_summaries_action():
+    if len(st.session_state.summary_cursors) > 1:
+        st.session_state.summary_cursors.pop()
+
+
+def dismiss_job_action(job_id):
+    database.dismiss_summary_job(job_id)
+
+
+def save_summary(input_text, summary, title):
+    keywords = utils.extract_keywords(input_text)
+    display_summary = f"{summary}\n\n**Key Topics:** {', '.join(keywords)}" if keywords else summary
+    if database.add_summary(username, input_text, display_summary, title=title):
+        st.session_state.summary_cursors = [None]
+        st.toast("✅ Summary saved!", icon="📄")
+        st.rerun()
+    else:
+        st.error("Could not save summary to history.")
+
+
+def summary_lengths(length_pct):
+    """Map the percentage to token lengths: 10% → max=80, 100% → max=250."""
+    max_length = max(60, int(80 + (length_pct / 100) * 170))
+    return max_length, max(20, int(max_length * 0.3))
+
+
+def run_summarization(input_text, title, length_pct, preset):
+    """Queue a background job; with live output on, the jobs panel shows the summary as it
+    is written. Instant mode always runs inline. Called inline (not as callback)."""
     if not input_text or len(input_text.strip()) < 20:
         st.error("⚠️ Please provide at least 20 characters of text.")
         return
 
-    with st.spinner("🤖 AI is reading and summarizing… this may take a few seconds."):
-        # Map the percentage to token lengths: 10% → max=80, 100% → max=250
-        max_length = max(60, int(80 + (length_pct / 100) * 170))
-        min_length = max(20, int(max_length * 0.3))
-
-        summary = utils.generate_ai_summary(input_text, max_length=max_length, min_length=min_length)
-        keywords = utils.extract_keywords(input_text)
-        display_summary = f"{summary}\n\n**Key Topics:** {', '.join(keywords)}" if keywords else summary
+    max_length, min_length = summary_lengths(length_pct)
 
-        if database.add_summary(username, input_text, display_summary, title=title):
-            st.toast("✅ Summary saved!", icon="📄")
-            st.rerun()
+    if utils.DECODING_PRESETS.get(preset, {}).get('extractive'):
+        # Milliseconds, so no need for a background job
+        save_summary(input_text, utils.generate_ai_summary(input_text, max_length=max_length, preset=preset), title)
+    elif jobs.submit_summary_job(username, input_text, title, max_length, min_length, preset,
+                                 live=st.session_state.get("summary_stream", True)) is not None:
+        st.toast("🤖 Summary queued — you can keep working while it runs.", icon="📄")
+        st.rerun()
+    else:
+        st.error("Could not queue the summary. Please try again.")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def summary_jobs_panel():
+    """Poll this user's background jobs without rerunning the whole page."""
+    user_jobs = database.get_user_summary_jobs(username)
+    active = {j['id'] for j in user_jobs if j['status'] in ('queued', 'running')}
+    if st.session_state.active_job_ids - active:
+        # Something finished — refresh the full page so history shows it
+        st.session_state.active_job_ids = active
+        st.session_state.summary_cursors = [None]
+        st.rerun()
+    st.session_state.active_job_ids = active
+
+    for j in user_jobs:
+        title = j['title'] or 'Summary'
+        if j['status'] == 'failed':
+            c_msg, c_btn = st.columns([0.8, 0.2])
+            with c_msg:
+                st.error(f"**{title}** — {j['error'] or 'Summarization failed.'}")
+            with c_btn:
+                st.button("Dismiss", key=f"dismiss_job_{j['id']}", use_container_width=True,
+                          on_click=dismiss_job_action, args=(j['id'],))
+        elif j['status'] == 'queued':
+            st.progress(0.0, text=f"⏳ {title} — waiting in queue…")
+        elif j['live']:
+            with st.container(border=True):
+                st.markdown(f"**✍️ {title} — writing summary…**")
+                if j['partial_summary']:
+                    st.markdown(j['partial_summary'])
         else:
-            st.error("Could not save summary to history.")
+            total = j['progress_total'] or 0
+            pct = j['progress_done'] / total if total else 0.0
+            st.progress(min(pct, 1.0), text=f"🤖 {title} — summarizing ({j['progress_done']}/{total or '?'} parts)")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def model_status_banner():
+    """Show the warm-up notice until loading finishes, then refresh the page once."""
+    if utils.get_summarizer_status()['status'] != 'loading':
+        st.rerun()
+    st.info("🔥 The AI model is warming up. You can queue summaries now — they start as soon as it's ready — or pick 🚀 Instant.")
 
 
 # --- Main Page ---
 database.init_all_tables()
+utils.preload_summarizer()
+jobs.resume_unfinished_jobs()
 utils.load_css()
 render_navbar(active_page="Summarizer")
 
-summaries = database.get_summaries(username)
+total_summaries = database.count_summaries(username)
+# Fetch one extra row to know whether an older page exists
+summaries = database.get_summaries_page(username, SUMMARIES_PER_PAGE + 1,
+                                        after=st.session_state.summary_cursors[-1])
+if not summaries and len(st.session_state.summary_cursors) > 1:
+    # Current page emptied by deletes — step back to the newer page
+    st.session_state.summary_cursors.pop()
+    summaries = database.get_summaries_page(username, SUMMARIES_PER_PAGE + 1,
+                                            after=st.session_state.summary_cursors[-1])
+has_older = len(summaries) > SUMMARIES_PER_PAGE
+summaries = summaries[:SUMMARIES_PER_PAGE]
 
 # --- Page Header ---
 st.markdown("""
@@ -80,6 +175,11 @@ col_input, col_sidebar = st.columns([2, 1])
 
 # --- Left Column: Input & History ---
 with col_input:
+    model_status = utils.get_summarizer_status()
+    if model_status['status'] == 'loading':
+        model_status_banner()
+    elif model_status['status'] == 'failed':
+        st.warning(f"⚠️ The AI model could not be loaded: {model_status['error']}")
     tab_text, tab_file = st.tabs(["📄 Text Input", "📤 File Upload"])
 
     with tab_text:
@@ -104,7 +204,8 @@ with col_input:
                 run_summarization(
                     input_text=st.session_state.summarizer_text,
                     title="Text Summary",
-                    length_pct=length_pct
+                    length_pct=length_pct,
+                    preset=st.session_state.get("summary_preset", utils.DEFAULT_PRESET)
                 )
 
     with tab_file:
@@ -124,26 +225,33 @@ with col_input:
                     run_summarization(
                         input_text=extracted,
                         title=uploaded.name,
-                        length_pct=length_pct
+                        length_pct=length_pct,
+                        preset=st.session_state.get("summary_preset", utils.DEFAULT_PRESET)
                     )
                 else:
                     st.error("Could not extract text from the file, or it was too short.")
         st.info("ℹ️ Supports PDF, DOCX, and TXT files up to 10MB")
 
+    # --- Background Jobs ---
+    # Only start polling when there is something to watch
+    if database.get_user_summary_jobs(username):
+        st.markdown("<br>", unsafe_allow_html=True)
+        summary_jobs_panel()
+
     # --- Recent Summaries ---
     st.markdown("<br>", unsafe_allow_html=True)
     c_hist, c_clear = st.columns([0.7, 0.3])
     with c_hist:
         st.markdown("<h3 style='margin:0;'>📚 Recent Summaries</h3>", unsafe_allow_html=True)
     with c_clear:
-        if summaries:
+        if total_summaries:
             st.button("🗑️ Clear All", on_click=delete_all_summaries_action,
                       type="secondary", use_container_width=True)
 
     if not summaries:
         st.info("No summaries yet. Generate one above!")
     else:
-        for s in summaries[:5]:
+        for s in summaries:
             ts = s['created_ts'] or ""
             # Format timestamp nicely if possible
             try:
@@ -166,6 +274,12 @@ with col_input:
 
             st.code(s['summary_text'] or "", language="text")
 
+            # Source text is only loaded when the user asks for it
+            if st.toggle("Show original text", key=f"orig_{s['id']}"):
+                st.text_area("Original text", database.get_summary_original(s['id']) or "",
+                             height=150, disabled=True, key=f"orig_text_{s['id']}",
+                             label_visibility="collapsed")
+
             c_del, c_spacer = st.columns([0.18, 0.82])
             with c_del:
                 st.button("🗑️", key=f"del_{s['id']}", help="Delete this summary",
@@ -173,6 +287,16 @@ with col_input:
                           on_click=delete_summary_action, args=(s['id'],))
             st.markdown("<hr style='border:none; border-top:1px solid #e2e8f0; margin:0.75rem 0;'>", unsafe_allow_html=True)
 
+        c_newer, c_older = st.columns(2)
+        with c_newer:
+            st.button("← Newer", use_container_width=True,
+                      disabled=len(st.session_state.summary_cursors) == 1,
+                      on_click=newer_summaries_action)
+        with c_older:
+            st.button("Older →", use_container_width=True, disabled=not has_older,
+                      on_click=older_summaries_action,
+                      args=(summaries[-1]['id'],))
+
 # --- Right Column: Settings & Templates ---
 with col_sidebar:
     with st.container(border=True):
@@ -189,6 +313,21 @@ with col_sidebar:
             value="Balanced",
             help="Affects the minimum detail captured in the summary"
         )
+        presets = utils.DECODING_PRESETS
+        st.radio(
+            "Decoding",
+            options=list(presets),
+            index=list(presets).index(utils.DEFAULT_PRESET),
+            format_func=lambda p: presets[p]['label'],
+            captions=[presets[p]['help'] for p in presets],
+            key="summary_preset",
+        )
+        st.toggle(
+            "Live output",
+            value=True,
+            key="summary_stream",
+            help="Show the summary as it is written. It keeps running in the background if you change settings or pages."
+        )
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -237,7 +376,7 @@ with col_sidebar:
     # Stats sidebar
     with st.container(border=True):
         st.markdown("### 📊 Your Stats")
-        total = len(summaries)
+        total = total_summaries
         st.metric("Total Summaries", total)
         if total > 0:
             st.progress(min(total / 10, 1.0), text=f"{total}/10 summaries milestone")
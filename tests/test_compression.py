@@ -0,0 +1,33 @@
+"""compress_text must keep text within the token budget without dropping it."""
+import utils
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word."""
+
+    def __call__(self, pieces, add_special_tokens=True):
+        single = isinstance(pieces, str)
+        ids = [list(range(len(p.split()))) for p in ([pieces] if single else pieces)]
+        return {'input_ids': ids[0] if single else ids}
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_text_within_budget_is_unchanged():
+    text = "Short notes. Nothing to cut."
+    assert utils.compress_text(text, WordTokenizer(), budget=100) == text
+
+
+def test_long_punctuated_text_fits_budget():
+    text = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(600))
+    compressed = utils.compress_text(text, WordTokenizer(), budget=500)
+    assert 0 < word_count(compressed) <= 500
+
+
+def test_long_text_without_punctuation_is_not_dropped():
+    # e.g. bullet notes or a slide deck: one "sentence" far over the budget
+    text = " ".join(f"term{i % 300}" for i in range(5400))
+    compressed = utils.compress_text(text, WordTokenizer(), budget=3840)
+    assert 0 < word_count(compressed) <= 3840
@@ -0,0 +1,22 @@
+"""Extractive summaries stay within the requested length."""
+import extractive
+
+WORD_BUDGET = int(150 * extractive.WORDS_PER_TOKEN)
+
+
+def test_picks_whole_sentences_in_order():
+    sentences = [f"Cells divide by mitosis in stage {i}." for i in range(20)]
+    summary = extractive.summarize(" ".join(sentences), max_length=150)
+    picked = [s for s in sentences if s in summary]
+    assert picked and " ".join(picked) == summary
+    assert len(summary.split()) <= WORD_BUDGET
+
+
+def test_short_text_is_returned_whole():
+    assert extractive.summarize("  One sentence only.  ") == "One sentence only."
+
+
+def test_long_text_without_punctuation_is_capped():
+    text = " ".join(f"term{i % 300}" for i in range(5400))
+    summary = extractive.summarize(text, max_length=150)
+    assert 0 < len(summary.split()) <= WORD_BUDGET
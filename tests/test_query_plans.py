@@ -0,0 +1,89 @@
+"""The hot per-user queries must be served by indexes, not full table scans.
+
+Each test calls the real query function on a freshly migrated database,
+records the statements it runs, and checks their EXPLAIN QUERY PLAN.
+"""
+import re
+from datetime import date, timedelta
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def statements(tmp_path, monkeypatch):
+    """Migrate a temporary database; return the list of SQL statements run against it."""
+    executed = []
+    open_connection = database._open_connection
+
+    def traced_connection():
+        conn = open_connection()
+        conn.set_trace_callback(executed.append)
+        return conn
+
+    database.close_all_connections()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "plans.sqlite"))
+    monkeypatch.setattr(database, "_schema_version", 0)
+    monkeypatch.setattr(database, "_open_connection", traced_connection)
+    database.init_all_tables()
+    executed.clear()
+    yield executed
+    database.close_all_connections()
+
+
+def table_scans(sql):
+    """Tables the plan of sql reads with a full scan (CTEs and subqueries excluded)."""
+    with database.get_connection() as conn:
+        conn.set_trace_callback(None)
+        plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [detail for detail in plan
+            if (m := re.match(r"SCAN (\w+)", detail)) and m.group(1) in tables]
+
+
+def selects(executed):
+    return [sql for sql in executed if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def assert_indexed(executed):
+    queries = selects(executed)
+    assert queries
+    for sql in queries:
+        assert table_scans(sql) == [], sql
+
+
+def test_tasks_range_query(statements):
+    today = date.today()
+    database.get_tasks_in_range("alice", today, today + timedelta(days=7))
+    assert_indexed(statements)
+
+
+def test_tasks_completed_filter(statements):
+    database.get_tasks_in_range("alice", completed=True)
+    assert_indexed(statements)
+
+
+def test_summaries_keyset_page(statements):
+    database.get_summaries_page("alice", limit=5, after=10)
+    assert_indexed(statements)
+
+
+def test_user_stats(statements):
+    database.get_user_stats("alice")
+    assert any("study_daily" in sql for sql in selects(statements))
+    assert_indexed(statements)
+
+
+def test_activity_series(statements):
+    today = date.today()
+    database.get_activity_series("alice", today - timedelta(days=30), today, bucket="week")
+    assert_indexed(statements)
+
+
+def test_summaries_keyset_page_uses_index_order(statements):
+    database.get_summaries_page("alice", limit=5, after=10)
+    with database.get_connection() as conn:
+        conn.set_trace_callback(None)
+        plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + selects(statements)[0])]
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
@@ -1,7 +1,12 @@
 import bcrypt
+import hashlib
 import logging
 import os
+import re
+import threading
 import streamlit as st
+from collections import deque
+from concurrent.futures import Future
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,74 +49,773 @@ def verify_password(password: str, hashed: str) -> bool:
 
 # --- AI & File Helpers (Lazy Loaded) ---
 
-@st.cache_resource
-def load_summarizer():
+# Small, efficient model suitable for this app
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-12-6"
+# Run the model in one shared worker process with cross-session batching
+SUMMARIZER_WORKER = os.getenv("SUMMARIZER_WORKER", "0") == "1"
+# Chunks per forward pass; larger batches help CPU throughput up to memory limits
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))
+# Token budget per chunk. DistilBART accepts 1024 tokens; the headroom covers
+# special tokens and tokenization drift when sentences are joined.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "960"))
+# Sentences repeated at the start of the next chunk to keep context across cuts
+CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "0"))
+# Model tokens of input passed to the abstractive model. Longer texts are cut
+# down to their most salient sentences first, so cost is bounded by this
+# budget rather than document length. 0 disables.
+INPUT_TOKEN_BUDGET = int(os.getenv("INPUT_TOKEN_BUDGET", "3840"))
+# Output length of each reduce-stage summary when combining chunk summaries
+REDUCE_MAX_LENGTH = 200
+REDUCE_MIN_LENGTH = 60
+# Safety stop for the reduce loop; each level shrinks the input several-fold
+MAX_REDUCE_LEVELS = 6
+
+# Decoding presets. Output limits are capped at length_ratio of each chunk's
+# token count, so short chunks are not padded out to the requested length.
+DECODING_PRESETS = {
+    'instant': {
+        'label': "🚀 Instant",
+        'help': "Picks the key sentences from your text. Returns immediately, no AI model needed.",
+        'extractive': True,
+    },
+    'fast': {
+        'label': "⚡ Fast",
+        'help': "Greedy decoding with tight length limits. Several times quicker on CPU.",
+        'generate': {'num_beams': 1, 'do_sample': False},
+        'length_ratio': 0.35,
+    },
+    'quality': {
+        'label': "🎯 Quality",
+        'help': "Beam search. Slower, usually more fluent.",
+        'generate': {'num_beams': 4, 'early_stopping': True, 'no_repeat_ngram_size': 3, 'do_sample': False},
+        'length_ratio': 0.6,
+    },
+}
+DEFAULT_PRESET = 'fast'
+# Floor for the adaptive cap, so very short chunks still get a sentence or two
+MIN_SUMMARY_TOKENS = 30
+# Answer with an extractive summary when the AI model can't produce one
+EXTRACTIVE_FALLBACK = os.getenv("EXTRACTIVE_FALLBACK", "1") == "1"
+FALLBACK_NOTE = "*(Quick extract — the AI model was unavailable, so these are the key sentences from your text.)*"
+
+class SummarizerUnavailable(RuntimeError):
+    """The abstractive model could not run; the message is user-facing."""
+
+def _build_summarizer():
+    """In-process pipeline, or a client for the shared worker process when
+    SUMMARIZER_WORKER=1 (see inference.py). Both are called the same way."""
     try:
-        from transformers import pipeline
-        # Small, efficient model suitable for this app
-        return pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
+        import inference
+        if SUMMARIZER_WORKER:
+            return inference.InferenceClient(SUMMARIZER_MODEL)
+        return inference.build_pipeline(SUMMARIZER_MODEL)
     except Exception as e:
         logger.error(f"Error loading summarizer: {e}")
         return None
 
-def extract_text_from_file(uploaded_file):
-    text = ""
+def use_summarizer():
+    """Context manager lending the summarizer (None if unavailable).
+
+    The model lives in inference.registry, which unloads it when idle or over
+    the memory budget, but never while it is lent out.
+    """
+    import inference
+    return inference.registry.use(SUMMARIZER_MODEL, _build_summarizer)
+
+def load_summarizer():
+    """The summarizer, loading it if needed; prefer use_summarizer for long work."""
+    import inference
+    return inference.registry.get(SUMMARIZER_MODEL, _build_summarizer)
+
+# --- Model Preloading ---
+# The first page view starts loading and warming the model in the background,
+# so the first summary doesn't pay for imports, weight loading and the slow
+# first forward pass.
+PRELOAD_SUMMARIZER = os.getenv("PRELOAD_SUMMARIZER", "1") == "1"
+_WARMUP_TEXT = ("Students who review their notes within a day of a lecture remember far more of it. "
+                "Short, spaced study sessions work better than a single long session before an exam.")
+_model_state = {'status': 'idle', 'error': None, 'load_s': None}
+_model_state_lock = threading.Lock()
+
+def preload_summarizer():
+    """Start loading and warming the summarizer in a background thread (once per
+    process, and again after the registry has evicted it)."""
+    if not PRELOAD_SUMMARIZER:
+        return
+    import inference
+    with _model_state_lock:
+        if _model_state['status'] == 'ready' and inference.registry.peek(SUMMARIZER_MODEL) is None:
+            _model_state['status'] = 'idle'  # evicted while idle; warm it up again
+        if _model_state['status'] != 'idle':
+            return
+        _model_state['status'] = 'loading'
+    threading.Thread(target=_warm_up_summarizer, name="summarizer-preload", daemon=True).start()
+
+def _warm_up_summarizer():
+    import time
+    start = time.perf_counter()
     try:
-        if uploaded_file.name.endswith('.pdf'):
-            import fitz  # PyMuPDF
-            doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-            for page in doc:
-                text += page.get_text()
-        elif uploaded_file.name.endswith('.docx'):
-            import docx
-            doc = docx.Document(uploaded_file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        elif uploaded_file.name.endswith('.txt'):
-            text = uploaded_file.read().decode('utf-8')
+        with use_summarizer() as summarizer:
+            if summarizer is None:
+                raise RuntimeError("AI Summarizer unavailable")
+            _ = summarizer.tokenizer  # load the tokenizer now (lazy in worker mode)
+            # One tiny pass initializes kernels and thread pools
+            summarizer(_WARMUP_TEXT, max_length=20, min_length=5, num_beams=1, do_sample=False)
+        _model_state.update(status='ready', load_s=round(time.perf_counter() - start, 1))
+        logger.info(f"Summarizer ready after {_model_state['load_s']}s")
+    except Exception as e:
+        logger.error(f"Summarizer preload failed: {e}")
+        _model_state.update(status='failed', error=str(e))
+
+def get_summarizer_status():
+    """Preload state: 'idle', 'loading', 'ready' or 'failed', with error and load
+    time, plus whether the model is resident right now (it may have been evicted)."""
+    import inference
+    return {**_model_state, 'loaded': inference.registry.peek(SUMMARIZER_MODEL) is not None}
+
+def get_model_stats():
+    """Loaded models, recent evictions with RSS before/after, and current RSS."""
+    import inference
+    return inference.registry.stats()
+
+def get_inference_stats():
+    """Queue depth and latency of the worker process, or None when running in-process."""
+    import inference
+    summarizer = inference.registry.peek(SUMMARIZER_MODEL)
+    return summarizer.stats() if hasattr(summarizer, "stats") else None
+
+def extract_text_from_file(uploaded_file, stats=None):
+    """Whole text of an uploaded file, or "" if it could not be read (see extraction.py)."""
+    return "".join(iter_file_text(uploaded_file, stats))
+
+def iter_file_text(uploaded_file, stats=None):
+    """Yield an uploaded file's text page by page (PDF) or paragraph by paragraph.
+
+    Files seen before come from the extraction cache, in one piece, without
+    parsing. Parse errors are logged and shown, and end the stream early.
+    """
+    source = file_text_source(uploaded_file, stats)
+    if isinstance(source, str):
+        yield source
+    else:
+        yield from source
+
+def file_text_source(uploaded_file, stats=None):
+    """The text of an upload: the cached str if it was extracted before, else a
+    generator extracting it (as iter_file_text). The upload is hashed once either way."""
+    import database
+    data = uploaded_file.getvalue()
+    key = extraction_cache_key(uploaded_file.name, data)
+    cached = database.get_cached_extraction(key)
+    if cached is not None:
+        _extraction_cache_stats['hits'] += 1
+        return cached
+    return _extract_and_cache(uploaded_file.name, data, key, stats)
+
+def _extract_and_cache(name, data, key, stats):
+    import database
+    import extraction
+    _extraction_cache_stats['misses'] += 1
+    pieces = []
+    try:
+        for piece in extraction.iter_text(name, data, stats):
+            pieces.append(piece)
+            yield piece
+    except extraction.ExtractionLimitError as e:
+        st.error(f"⚠️ {e}")
     except ImportError:
         logger.error("Required library (PyMuPDF or python-docx) not installed.")
         st.error("Missing dependencies for file parsing. Please run: pip install pymupdf python-docx")
     except Exception as e:
         logger.error(f"File Parsing Error: {e}")
-    return text
+    else:
+        # Only complete extractions are cached
+        if pieces:
+            database.put_cached_extraction(key, "".join(pieces))
+
+# --- Extraction Cache ---
+# Extracted text is persisted in SQLite (database.extraction_cache), keyed by
+# the upload's bytes, so re-uploads skip PyMuPDF/python-docx entirely.
+_extraction_cache_stats = {'hits': 0, 'misses': 0}
+
+def extraction_cache_key(name, data):
+    """SHA-256 of the file bytes, plus the file type and page limit that shape the text."""
+    import extraction
+    extension = os.path.splitext(name.lower())[1]
+    return f"{hashlib.sha256(data).hexdigest()}:{extension}:{extraction.MAX_PAGES}"
+
+def get_extraction_cache_stats():
+    """Hit/miss counters and hit rate for this process, plus persistent cache size."""
+    import database
+    lookups = _extraction_cache_stats['hits'] + _extraction_cache_stats['misses']
+    hit_rate = round(_extraction_cache_stats['hits'] / lookups, 3) if lookups else 0.0
+    return {**_extraction_cache_stats, 'hit_rate': hit_rate, **database.get_extraction_cache_info()}
+
+# --- Chunking ---
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+|\n\s*\n')
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation and blank lines."""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+def _token_counts(tokenizer, pieces):
+    """Token count of each piece, from a single batched tokenizer call."""
+    if not pieces:
+        return []
+    return [len(ids) for ids in tokenizer(pieces, add_special_tokens=False)['input_ids']]
+
+def _split_long_sentence(tokenizer, sentence, max_tokens):
+    """Break a sentence longer than the budget at word boundaries."""
+    words = sentence.split()
+    parts, current, used = [], [], 0
+    for word, n in zip(words, _token_counts(tokenizer, words)):
+        if current and used + n > max_tokens:
+            parts.append(" ".join(current))
+            current, used = [], 0
+        current.append(word)
+        used += n
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+def chunk_text(text, tokenizer, max_tokens=CHUNK_MAX_TOKENS, overlap_sentences=CHUNK_OVERLAP_SENTENCES):
+    """Pack whole sentences into chunks of at most max_tokens model tokens.
+
+    Counting uses the model's own tokenizer, so chunks fill the context window
+    without being silently truncated. The last overlap_sentences of each chunk
+    are repeated at the start of the next.
+    """
+    return _pack(_counted_sentences(tokenizer, split_sentences(text), max_tokens), max_tokens, overlap_sentences)
+
+def _counted_sentences(tokenizer, raw, max_tokens=CHUNK_MAX_TOKENS):
+    """(sentence, token_count) pairs, with sentences over max_tokens split at word boundaries."""
+    sentences = []
+    for sentence, n in zip(raw, _token_counts(tokenizer, raw)):
+        if n > max_tokens:
+            parts = _split_long_sentence(tokenizer, sentence, max_tokens)
+            sentences.extend(zip(parts, _token_counts(tokenizer, parts)))
+        else:
+            sentences.append((sentence, n))
+    return sentences
+
+def compress_text(text, tokenizer, budget=INPUT_TOKEN_BUDGET):
+    """Keep the most salient sentences that fit budget model tokens, in original order.
+
+    Sentences are ranked with the extractive TF-IDF model (see extractive.py);
+    sentences longer than a chunk are first split at word boundaries, as for
+    chunking, so unpunctuated text is still selectable. Text already within
+    budget is returned unchanged.
+    """
+    if not budget:
+        return text
+    pairs = _counted_sentences(tokenizer, split_sentences(text), min(CHUNK_MAX_TOKENS, budget))
+    if sum(n for _, n in pairs) <= budget:
+        return text
+    sentences, counts = [s for s, _ in pairs], [n for _, n in pairs]
+    import extractive
+    keep = extractive.select_within_budget(sentences, counts, budget)
+    logger.info(f"Compressed input from {sum(counts)} to {sum(counts[i] for i in keep)} tokens")
+    return " ".join(sentences[i] for i in keep)
+
+def _pack(pieces, max_tokens, overlap=0):
+    """Greedily join (text, token_count) pieces into groups of at most max_tokens."""
+    return [" ".join(p for p, _ in group) for group in _pack_groups(pieces, max_tokens, overlap)]
+
+def _pack_groups(pieces, max_tokens, overlap=0):
+    """Like _pack, but returns each group as its list of (text, token_count) pieces."""
+    return list(_iter_pack(pieces, max_tokens, overlap))
+
+def _iter_pack(pieces, max_tokens, overlap=0):
+    """Incremental _pack_groups: yields each group as soon as it is complete."""
+    current, used = [], 0
+    for piece, n in pieces:
+        if current and used + n > max_tokens:
+            yield current
+            current = current[-overlap:] if overlap else []
+            used = sum(c for _, c in current)
+            # Drop overlap that would leave no room for the new piece
+            while current and used + n > max_tokens:
+                used -= current.pop(0)[1]
+        current.append((piece, n))
+        used += n
+    if current:
+        yield current
+
+def _iter_sentence_batches(pieces):
+    """Split text arriving in pieces into sentences, one list per piece.
+
+    An unfinished sentence is carried into the next piece, so the result
+    matches split_sentences on the joined text.
+    """
+    tail = ""
+    for piece in pieces:
+        parts = _SENTENCE_END.split(tail + piece)
+        tail = parts.pop()
+        batch = [p.strip() for p in parts if p.strip()]
+        if batch:
+            yield batch
+    if tail.strip():
+        yield [tail.strip()]
+
+def _iter_budgeted_chunks(pieces, tokenizer, budget=INPUT_TOKEN_BUDGET,
+                          max_tokens=CHUNK_MAX_TOKENS, overlap=CHUNK_OVERLAP_SENTENCES):
+    """Chunks of a text arriving in pieces, yielded as soon as they fill up.
+
+    Chunks are yielded while reading until they cover half of budget (the
+    document's opening). Text after that is held until the end: if it fits the
+    rest of the budget it is chunked as is, otherwise it is first cut to its
+    most salient sentences, as compress_text does for whole texts.
+    """
+    sentences = []
+
+    def read():
+        for batch in _iter_sentence_batches(pieces):
+            for pair in _counted_sentences(tokenizer, batch, max_tokens):
+                sentences.append(pair)
+                yield len(sentences) - 1, pair[1]
+
+    reader = read()
+    lead_budget = budget // 2 if budget else float('inf')
+    lead_used, emitted = 0, 0
+    for group in _iter_pack(reader, max_tokens, overlap):
+        n = sum(c for _, c in group)
+        if lead_used + n > lead_budget:
+            break
+        yield " ".join(sentences[i][0] for i, _ in group)
+        lead_used += n
+        emitted = group[-1][0] + 1
+    else:
+        return
+
+    for _ in reader:  # read the rest of the document
+        pass
+    rest = sentences[emitted:]
+    remaining = budget - lead_used
+    if sum(n for _, n in rest) > remaining:
+        import extractive
+        keep = extractive.select_within_budget([s for s, _ in rest], [n for _, n in rest], remaining)
+        logger.info(f"Compressed streamed input after the first {lead_used} tokens to {remaining} tokens")
+        rest = [rest[i] for i in keep]
+    yield from _pack(rest, max_tokens, overlap)
+
+# --- Summary Cache ---
+# Results are persisted in SQLite (database.summary_cache). Identical requests
+# that arrive while one is already running wait for it instead of running the
+# model again (single-flight).
+_summary_cache_stats = {'hits': 0, 'misses': 0, 'shared': 0}
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def summary_cache_key(text, **params):
+    """Hash of whitespace-normalized text plus generation parameters."""
+    normalized = " ".join(text.split())
+    parts = [normalized] + [f"{k}={params[k]}" for k in sorted(params)]
+    return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+def _summary_key(text, max_length, min_length, preset):
+    # Every setting that changes the output, so retuning them never serves stale summaries
+    import inference
+    model = SUMMARIZER_MODEL + ("-int8" if inference.SUMMARIZER_QUANTIZE else "")
+    return summary_cache_key(text, model=model, max_length=max_length, min_length=min_length, preset=preset,
+                             budget=INPUT_TOKEN_BUDGET, chunk_tokens=CHUNK_MAX_TOKENS,
+                             chunk_overlap=CHUNK_OVERLAP_SENTENCES, reduce_max=REDUCE_MAX_LENGTH,
+                             reduce_min=REDUCE_MIN_LENGTH, reduce_levels=MAX_REDUCE_LEVELS)
+
+def get_summary_cache_stats():
+    """Hit/miss counters for this process, plus persistent cache size."""
+    import database
+    return {**_summary_cache_stats, **database.get_summary_cache_info()}
 
-def generate_ai_summary(text, max_length=150, min_length=40):
-    """Generate a summary using the cached HuggingFace pipeline."""
+class _FlightAbandoned(Exception):
+    """The leader of a flight stopped before producing a result (e.g. a closed stream)."""
+
+def _join_flight(key):
+    """Return (future, leader) for key; the leader must finish the flight with _end_flight."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    return future, leader
+
+def _end_flight(key, future, result=None, error=None):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+def _single_flight(key, fn):
+    """Run fn() once per key at a time; concurrent callers share the result."""
+    future, leader = _join_flight(key)
+    if not leader:
+        _summary_cache_stats['shared'] += 1
+        try:
+            return future.result()
+        except _FlightAbandoned:
+            return _single_flight(key, fn)
+    try:
+        result = fn()
+    except BaseException as e:
+        _end_flight(key, future, error=e)
+        raise
+    _end_flight(key, future, result)
+    return result
+
+def generate_ai_summary(text, max_length=150, min_length=40, batch_size=SUMMARY_BATCH_SIZE,
+                        preset=DEFAULT_PRESET, progress=None):
+    """Generate a summary, serving repeated inputs from the persistent cache.
+
+    Returns the summary, or a user-facing message if it could not be produced.
+    """
+    return summarize_text(text, max_length, min_length, batch_size, preset, progress)[0]
+
+def summarize_text(text, max_length=150, min_length=40, batch_size=SUMMARY_BATCH_SIZE,
+                   preset=DEFAULT_PRESET, progress=None):
+    """Like generate_ai_summary, but returns (summary or message, succeeded).
+
+    progress, if given, is called as progress(done, total) as model passes
+    finish; total grows when reduce levels are added.
+    """
     if not text or len(text.strip()) == 0:
-        return "No text provided."
+        return "No text provided.", False
+    if DECODING_PRESETS.get(preset, {}).get('extractive'):
+        return extractive_summary(text, max_length), True
 
-    summarizer = load_summarizer()
-    if not summarizer:
-        return "AI Summarizer unavailable. Ensure 'transformers' and 'torch' are installed."
+    import database
+    key = _summary_key(text, max_length, min_length, preset)
+    cached = database.get_cached_summary(key)
+    if cached is not None:
+        _summary_cache_stats['hits'] += 1
+        return cached, True
 
-    # DistilBART has a ~1024 token limit — chunk at ~3000 chars to stay safe
-    chunk_size = 3000
-    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    def compute():
+        # Another request may have filled the cache while we waited for the lock
+        cached = database.get_cached_summary(key)
+        if cached is not None:
+            _summary_cache_stats['hits'] += 1
+            return cached, True
+        _summary_cache_stats['misses'] += 1
+        try:
+            summary, ok = _summarize(text, max_length, min_length, batch_size, preset, progress)
+        except SummarizerUnavailable as e:
+            if not EXTRACTIVE_FALLBACK:
+                return str(e), False
+            # Not cached, so the next request tries the model again
+            return f"{FALLBACK_NOTE}\n\n{extractive_summary(text, max_length)}", True
+        if ok:
+            database.put_cached_summary(key, summary)
+        return summary, ok
 
-    summaries = []
+    return _single_flight(key, compute)
+
+def extractive_summary(text, max_length=150):
+    """Key sentences of text, chosen by TF-IDF TextRank (see extractive.py)."""
+    import extractive
+    return extractive.summarize(text, max_length=max_length)
+
+def _length_limits(n_tokens, max_length, min_length, ratio):
+    """(max_length, min_length) for an input of n_tokens, capped at ratio of its length."""
+    max_length = min(max_length, max(MIN_SUMMARY_TOKENS, int(n_tokens * ratio)))
+    return max_length, min(min_length, max_length // 2)
+
+def _summarize_batch(summarizer, texts, batch_size, track=None, limits=None, **gen_kwargs):
+    """Summarize texts in padded batches, returning summaries in input order.
+
+    Inputs are sorted by length first so each batch pads to similar lengths.
+    limits, if given, holds a (max_length, min_length) pair per text; each
+    batch uses the loosest pair among its members.
+    track(added, finished), if given, is told about queued and finished texts.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    if track:
+        track(added=len(texts))
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        if limits:
+            gen_kwargs['max_length'] = max(limits[i][0] for i in batch)
+            gen_kwargs['min_length'] = min(limits[i][1] for i in batch)
+        outputs = summarizer([texts[i] for i in batch], batch_size=batch_size, **gen_kwargs)
+        for i, out in zip(batch, outputs):
+            out = out[0] if isinstance(out, list) else out
+            results[i] = out['summary_text']
+        if track:
+            track(finished=len(batch))
+    return results
+
+def _reduce_summaries(summarizer, summaries, batch_size, preset, track=None):
+    """Recursively combine chunk summaries into one summary (map-reduce).
+
+    Each level packs the current summaries into token-budgeted groups and
+    summarizes all groups of that level in one batched call, until the
+    remainder fits a single pass. Nothing is cut off along the way.
+    """
+    tokenizer = summarizer.tokenizer
+    gen_kwargs = dict(DECODING_PRESETS[preset]['generate'], truncation=True,
+                      max_length=REDUCE_MAX_LENGTH, min_length=REDUCE_MIN_LENGTH)
+    for _ in range(MAX_REDUCE_LEVELS):
+        if len(summaries) == 1:
+            return summaries[0]
+        counts = _token_counts(tokenizer, summaries)
+        if sum(counts) <= CHUNK_MAX_TOKENS:
+            break
+        groups = _pack(list(zip(summaries, counts)), CHUNK_MAX_TOKENS)
+        summaries = _summarize_batch(summarizer, groups, batch_size, track, **gen_kwargs)
+    return _summarize_batch(summarizer, [" ".join(summaries)], 1, track, **gen_kwargs)[0]
+
+def _summarize(text, max_length, min_length, batch_size=SUMMARY_BATCH_SIZE, preset=DEFAULT_PRESET, progress=None):
+    """Run the model. Returns (summary or user-facing error message, succeeded).
+
+    Raises SummarizerUnavailable when the failure lies with the model rather
+    than the input.
+    """
+    counts = {'done': 0, 'total': 0}
+
+    def track(added=0, finished=0):
+        counts['total'] += added
+        counts['done'] += finished
+        if progress:
+            progress(counts['done'], counts['total'])
+
+    if preset not in DECODING_PRESETS or DECODING_PRESETS[preset].get('extractive'):
+        preset = DEFAULT_PRESET
+
+    import inference
+    # Hold a lease so the registry can't unload the model mid-run
+    with use_summarizer() as summarizer:
+        if not summarizer:
+            raise SummarizerUnavailable("AI Summarizer unavailable. Ensure 'transformers' and 'torch' are installed.")
+
+        try:
+            # Most salient sentences within the input budget, packed up to the model's token limit
+            text = compress_text(text, summarizer.tokenizer)
+            chunks = [c for c in chunk_text(text, summarizer.tokenizer) if len(c.strip()) >= 30]
+            if not chunks:
+                return "Text was too short or empty to summarize.", False
+
+            # Map: summarize every chunk, with output limits scaled to its length
+            settings = DECODING_PRESETS[preset]
+            limits = [_length_limits(n, max_length, min_length, settings['length_ratio'])
+                      for n in _token_counts(summarizer.tokenizer, chunks)]
+            summaries = _summarize_batch(summarizer, chunks, batch_size, track, limits,
+                                         truncation=True, **settings['generate'])
+            if len(summaries) == 1:
+                return summaries[0], True
+
+            # Short enough to read as-is
+            if _token_counts(summarizer.tokenizer, [" ".join(summaries)])[0] <= CHUNK_MAX_TOKENS:
+                return " ".join(summaries), True
+
+            return _reduce_summaries(summarizer, summaries, batch_size, preset, track), True
+        except inference.InferenceBusy:
+            raise SummarizerUnavailable("The summarizer is busy right now. Please try again in a moment.")
+        except Exception as e:
+            logger.error(f"AI Summary Error: {e}")
+            raise SummarizerUnavailable("Error generating summary. The text might be too complex or malformed.")
+
+# --- Streaming ---
+def stream_summary(source, max_length=150, min_length=40, preset=DEFAULT_PRESET):
+    """Generate a summary incrementally, as a generator of (kind, text) events.
+
+    ('token', piece) is yielded as each chunk summary is written, ('chunk',
+    summary) when a chunk is finished, then ('final', summary) once the whole
+    summary is known, or ('error', message) if it could not be produced.
+    Chunks run one at a time, so the first words arrive after one chunk's
+    first decoding steps instead of after the whole document.
+
+    source is the text, or an iterable of text pieces such as iter_file_text();
+    chunks are then summarized while later pieces are still being read (see
+    _iter_budgeted_chunks). Summaries of streamed sources are not cached.
+    Identical text requested while it is already being summarized (by either
+    this or summarize_text) waits for that run and gets the whole summary at once.
+    """
+    if not isinstance(source, str) and DECODING_PRESETS.get(preset, {}).get('extractive'):
+        source = "".join(source)
+
+    import database
+    key = None
+    if isinstance(source, str):
+        if not source.strip():
+            yield 'error', "No text provided."
+            return
+        if DECODING_PRESETS.get(preset, {}).get('extractive'):
+            summary = extractive_summary(source, max_length)
+            yield 'token', summary
+            yield 'final', summary
+            return
+        key = _summary_key(source, max_length, min_length, preset)
+        cached = database.get_cached_summary(key)
+        if cached is not None:
+            _summary_cache_stats['hits'] += 1
+            yield 'token', cached
+            yield 'final', cached
+            return
+        future, leader = _join_flight(key)
+        if not leader:
+            _summary_cache_stats['shared'] += 1
+            try:
+                summary, ok = future.result()
+            except _FlightAbandoned:
+                yield from stream_summary(source, max_length, min_length, preset)
+                return
+            except Exception:
+                summary, ok = "Error generating summary. The text might be too complex or malformed.", False
+            if ok:
+                yield 'token', summary
+                yield 'final', summary
+            else:
+                yield 'error', summary
+            return
+        # Another request may have filled the cache while we joined the flight
+        cached = database.get_cached_summary(key)
+        if cached is not None:
+            _end_flight(key, future, (cached, True))
+            _summary_cache_stats['hits'] += 1
+            yield 'token', cached
+            yield 'final', cached
+            return
+        _summary_cache_stats['misses'] += 1
+        yield from _lead_stream(key, future, source, max_length, min_length, preset)
+        return
+    else:
+        # Keep what was read, for the extractive fallback
+        consumed, pieces = [], iter(source)
+        source = (consumed.append(piece) or piece for piece in pieces)
+
+    for kind, value in _run_stream(source, max_length, min_length, preset, lambda: ''.join(consumed + list(pieces))):
+        if kind == 'error' and not ''.join(consumed).strip():
+            value = "No text provided."
+        yield kind, value
+
+def _lead_stream(key, future, text, max_length, min_length, preset):
+    """Stream text as the leader of its flight: cache the result and share it with waiters."""
+    import database
+    outcome = None
+    try:
+        for kind, value in _run_stream(text, max_length, min_length, preset, lambda: text):
+            if kind == 'final':
+                outcome = (value, True)
+                if not value.startswith(FALLBACK_NOTE):  # fallbacks are not cached
+                    database.put_cached_summary(key, value)
+            elif kind == 'error':
+                outcome = (value, False)
+            yield kind, value
+    finally:
+        if outcome is None:
+            _end_flight(key, future, error=_FlightAbandoned())
+        else:
+            _end_flight(key, future, outcome)
+
+def _run_stream(source, max_length, min_length, preset, read_text):
+    """_stream_summarize with the extractive fallback; read_text() returns the whole input."""
     try:
+        yield from _stream_summarize(source, max_length, min_length, preset)
+    except SummarizerUnavailable as e:
+        if not EXTRACTIVE_FALLBACK:
+            yield 'error', str(e)
+            return
+        text = read_text()
+        if not text.strip():
+            yield 'error', "No text provided."
+            return
+        summary = f"{FALLBACK_NOTE}\n\n{extractive_summary(text, max_length)}"
+        yield 'token', summary
+        yield 'final', summary
+
+def _stream_generate(summarizer, text, **gen_kwargs):
+    """Yield ('token', piece) events for one summary as the model generates it; returns the summary."""
+    from transformers import TextIteratorStreamer
+    import inference
+    streamer = TextIteratorStreamer(summarizer.tokenizer, skip_special_tokens=True,
+                                    timeout=inference.REQUEST_TIMEOUT_S)
+    outcome = {}
+
+    def run():
+        try:
+            out = summarizer(text, streamer=streamer, **gen_kwargs)[0]
+            outcome['summary'] = (out[0] if isinstance(out, list) else out)['summary_text']
+        except Exception as e:
+            outcome['error'] = e
+            streamer.end()  # unblock the reader
+
+    thread = threading.Thread(target=run, name="summary-stream", daemon=True)
+    thread.start()
+    for piece in streamer:
+        if piece:
+            yield 'token', piece
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['summary']
+
+def _stream_summarize(source, max_length, min_length, preset):
+    """Model side of stream_summary. Raises SummarizerUnavailable like _summarize."""
+    if preset not in DECODING_PRESETS or DECODING_PRESETS[preset].get('extractive'):
+        preset = DEFAULT_PRESET
+
+    import inference
+    with use_summarizer() as summarizer:
+        if not summarizer:
+            raise SummarizerUnavailable("AI Summarizer unavailable. Ensure 'transformers' and 'torch' are installed.")
+
+        try:
+            tokenizer = summarizer.tokenizer
+            if isinstance(source, str):
+                chunks = chunk_text(compress_text(source, tokenizer), tokenizer)
+            else:
+                chunks = _iter_budgeted_chunks(source, tokenizer)
+            chunks = (c for c in chunks if len(c.strip()) >= 30)
+
+            summaries = yield from _stream_chunks(summarizer, chunks, max_length, min_length, DECODING_PRESETS[preset])
+            if not summaries:
+                yield 'error', "Text was too short or empty to summarize."
+            elif len(summaries) == 1 or _token_counts(tokenizer, [" ".join(summaries)])[0] <= CHUNK_MAX_TOKENS:
+                yield 'final', " ".join(summaries)
+            else:
+                yield 'final', _reduce_summaries(summarizer, summaries, SUMMARY_BATCH_SIZE, preset)
+        except inference.InferenceBusy:
+            raise SummarizerUnavailable("The summarizer is busy right now. Please try again in a moment.")
+        except Exception as e:
+            logger.error(f"AI Summary Stream Error: {e}")
+            raise SummarizerUnavailable("Error generating summary. The text might be too complex or malformed.")
+
+def _stream_chunks(summarizer, chunks, max_length, min_length, settings):
+    """Summarize chunks as they arrive, yielding stream events; returns the chunk summaries."""
+    import inference
+
+    def gen_kwargs(chunk):
+        n = _token_counts(summarizer.tokenizer, [chunk])[0]
+        max_len, min_len = _length_limits(n, max_length, min_length, settings['length_ratio'])
+        return dict(settings['generate'], truncation=True, max_length=max_len, min_length=min_len)
+
+    summaries = []
+    if isinstance(summarizer, inference.InferenceClient):
+        # No token stream across processes: queue chunks as they arrive, report each as it finishes
+        pending = deque()
         for chunk in chunks:
-            if len(chunk.strip()) < 30:
-                continue
-            res = summarizer(chunk, max_length=max_length, min_length=min_length, do_sample=False)
-            summaries.append(res[0]['summary_text'])
-
-        if not summaries:
-            return "Text was too short or empty to summarize."
-
-        # If multiple chunks, do a final pass on the combined summaries
-        if len(summaries) > 1:
-            combined = " ".join(summaries)
-            if len(combined) > chunk_size:
-                final_res = summarizer(combined[:chunk_size], max_length=200, min_length=60, do_sample=False)
-                return final_res[0]['summary_text']
-            return combined
-
-        return summaries[0]
-    except Exception as e:
-        logger.error(f"AI Summary Error: {e}")
-        return "Error generating summary. The text might be too complex or malformed."
+            pending.append(summarizer.submit(chunk, **gen_kwargs(chunk)))
+            while pending and pending[0].done():
+                summaries.append(pending.popleft().result())
+                yield 'token', summaries[-1]
+                yield 'chunk', summaries[-1]
+        while pending:
+            summaries.append(pending.popleft().result(timeout=inference.REQUEST_TIMEOUT_S))
+            yield 'token', summaries[-1]
+            yield 'chunk', summaries[-1]
+    else:
+        for chunk in chunks:
+            kw = gen_kwargs(chunk)
+            if kw.get('num_beams', 1) > 1:
+                # generate() refuses a streamer with beam search; send the chunk whole
+                out = summarizer(chunk, **kw)[0]
+                summaries.append((out[0] if isinstance(out, list) else out)['summary_text'])
+                yield 'token', summaries[-1]
+            else:
+                summaries.append((yield from _stream_generate(summarizer, chunk, **kw)))
+            yield 'chunk', summaries[-1]
+    return summaries
 
 def extract_keywords(text):
     try: